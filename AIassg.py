@@ -1,17 +1,69 @@
+import time
+STARTED = time.perf_counter()  # the start of the imports, for --startup-time
+import signal
+import sys
+
+def demo(screen):
+    from asciimatics.effects import Cycle, Stars
+    from asciimatics.renderers import FigletText
+    from asciimatics.scene import Scene
+    effects = [
+        Cycle(
+            screen,
+            FigletText("The Maze Runner", font='big'),
+            int(screen.height / 2 - 8)),
+        Stars(screen, 200)
+    ]
+    screen.play([Scene(effects, 500)])
+
+def splash_screen():
+    """Plays the asciimatics splash screen until the process is terminated, or 'q' is pressed"""
+    try:
+        from asciimatics.screen import Screen
+    except ImportError:  # the splash screen is optional
+        return 0
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # restores the terminal on terminate()
+    Screen.wrapper(demo)
+    return 0
+
+if __name__ == '__main__':
+    # the commands without user interface, and the splash screen played by a child process, are run before the
+    # user interface and its modules are imported
+    if sys.argv[1:2] == ["solve"]:  # the batch solver
+        import batch
+        sys.exit(batch.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["bench"]:  # the benchmarks
+        import bench
+        sys.exit(bench.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["serve"]:  # the local HTTP/JSON solve service
+        import server
+        sys.exit(server.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["check"]:  # the randomized checks of the fast searches
+        import checks
+        sys.exit(checks.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["splash"]:  # the asciimatics splash screen
+        sys.exit(splash_screen())
+
+import argparse
 import math
 import os
 import random
-import time
+import subprocess
+import threading
+import gridfile
+import mazes
+import metrics
 import numpy
+import render
+import replay
+import solver
+import worker
 from functools import partial
-from operator import attrgetter
 from tkinter import *
+from tkinter import filedialog
 from tkinter import font
 from tkinter import messagebox
-from asciimatics.effects import Cycle, Stars
-from asciimatics.renderers import FigletText
-from asciimatics.scene import Scene
-from asciimatics.screen import Screen
 
 
 class Maze51:
@@ -59,112 +111,13 @@ class Maze51:
             if tw:
                 tw.destroy()
 
-    class MyMaze(object):
-        """ Helper class that creates a random, perfect (without cycles) maze """
-        def __init__(self, x_dimension, y_dimension):
-            self.dimensionX = x_dimension  # dimension of maze
-            self.dimensionY = y_dimension
-            self.gridDimensionX = x_dimension * 2 + 1  # dimension of output grid
-            self.gridDimensionY = y_dimension * 2 + 1
-
-            self.mazeGrid = [[' ' for y in range(self.gridDimensionY)] for x in range(self.gridDimensionX)]  # output grid
-            self.cells = [[self.Cell(x, y, False) for y in range(self.dimensionY)] for x in range(self.dimensionX)]  # 2d array of Cells
-            self.generate_maze()
-            self.update_grid()
-
-        class Cell(object):
-            def __init__(self, x, y, is_wall=True):
-                self.neighbors = []  # cells this cell is connected to
-                self.open = True  # if true, has yet to be used in generation
-                self.x = x  # coordinates
-                self.y = y
-                self.wall = is_wall  # impassable cell
-
-            def add_neighbor(self, other):
-                if other not in self.neighbors:  # avoid duplicates
-                    self.neighbors.append(other)
-                if self not in other.neighbors:  # avoid duplicates
-                    other.neighbors.append(self)
-
-            def is_cell_below_neighbor(self):
-                return self.__class__(self.x, self.y + 1) in self.neighbors
-
-            def is_cell_right_neighbor(self):
-                return self.__class__(self.x + 1, self.y) in self.neighbors
-
-            def __eq__(self, other):
-                if isinstance(other, self.__class__):
-                    return self.x == other.x and self.y == other.y
-                else:
-                    return False
-
-        def generate_maze(self):
-            start_at = self.get_cell(0, 0)  # STARTING POINT
-            start_at.open = False  # indicate cell closed for generation
-            cells = [start_at]
-            while cells:
-                if random.randint(0, 9) == 0:
-                    cell = cells.pop(random.randint(0, cells.__len__()) - 1)
-                else:
-                    cell = cells.pop(cells.__len__() - 1)
-                neighbors = []
-                potential_neighbors = [self.get_cell(cell.x + 1, cell.y), self.get_cell(cell.x, cell.y + 1),self.get_cell(cell.x - 1, cell.y), self.get_cell(cell.x, cell.y - 1)]
-                for other in potential_neighbors:
-                    if other is None or other.wall or not other.open:
-                        continue
-                    neighbors.append(other)
-                if not neighbors:
-                    continue
-                selected = neighbors[random.randint(0, neighbors.__len__()) - 1]
-                selected.open = False  # indicate cell closed for generation
-                cell.add_neighbor(selected)
-                cells.append(cell)
-                cells.append(selected)
-
-        def get_cell(self, x, y):
-            if x < 0 or y < 0:
-                return None
-            try:
-                return self.cells[x][y]
-            except IndexError:  # catch out of bounds
-                return None
-
-        def update_grid(self):
-            """ draw the maze """
-            back_char = ' '
-            wall_char = 'X'
-            cell_char = ' '
-            # fill background
-            for x in range(self.gridDimensionX):
-                for y in range(self.gridDimensionY):
-                    self.mazeGrid[x][y] = back_char
-            # build walls
-            for x in range(self.gridDimensionX):
-                for y in range(self.gridDimensionY):
-                    if x % 2 == 0 or y % 2 == 0:
-                        self.mazeGrid[x][y] = wall_char
-            # make meaningful representation
-            for x in range(self.dimensionX):
-                for y in range(self.dimensionY):
-                    current = self.get_cell(x, y)
-                    grid_x = x * 2 + 1
-                    grid_y = y * 2 + 1
-                    self.mazeGrid[grid_x][grid_y] = cell_char
-                    if current.is_cell_below_neighbor():
-                        self.mazeGrid[grid_x][grid_y + 1] = cell_char
-                    if current.is_cell_right_neighbor():
-                        self.mazeGrid[grid_x + 1][grid_y] = cell_char
-
     class Cell(object):
-        """ Helper class that represents the cell of the grid """
+        """ Helper class that represents the cell of the grid; the search labels live in the solver's arrays """
+        __slots__ = ("row", "col")
+
         def __init__(self, row, col):
             self.row = row
             self.col = col
-            self.g = 0
-            self.h = 0
-            self.f = 0
-            self.dist = 0
-            self.prev = self.__class__
 
         def __eq__(self, other):
             """ useful Cell equivalence """
@@ -172,18 +125,41 @@ class Maze51:
                 return self.row == other.row and self.col == other.col
             else:
                 return False
-    INFINITY = sys.maxsize  # The representation of the infinite
-    EMPTY = 0  # empty cell
-    OBST = 1  # cell with obstacle
-    ROBOT = 2  # the position of the robot
-    TARGET = 3  # the position of the target
-    FRONTIER = 4  # cells that form the frontier (OPEN SET)
-    CLOSED = 5  # cells that form the CLOSED SET
-    ROUTE = 6  # cells that form the robot-to-target path
+
+        def __hash__(self):
+            return hash((self.row, self.col))
+    INFINITY = solver.INFINITY  # The representation of the infinite
+    EMPTY = solver.EMPTY  # empty cell
+    OBST = solver.OBST  # cell with obstacle
+    ROBOT = solver.ROBOT  # the position of the robot
+    TARGET = solver.TARGET  # the position of the target
+    FRONTIER = solver.FRONTIER  # cells that form the frontier (OPEN SET)
+    CLOSED = solver.CLOSED  # cells that form the CLOSED SET
+    ROUTE = solver.ROUTE  # cells that form the robot-to-target path
+    COLORS = {EMPTY: "WHITE", OBST: "BLACK", ROBOT: "RED", TARGET: "GREEN",
+              FRONTIER: "BLUE", CLOSED: "CYAN", ROUTE: "YELLOW"}
+    COLOR_STATES = {color: state for state, color in COLORS.items()}
+    IMAGE_CELLS = 2500  # viewports with more cells are drawn as a single image
+    ARROW_SQUARE = 10  # the smallest cell size in pixels with arrows, which keeps them to IMAGE_CELLS cells in view
+    MAX_SIZE = 9999  # the maximum number of rows or columns
+    VIEW_SIZE = 500  # the size of the viewport in pixels
+    MAX_SQUARE = 64  # the cell size in pixels at the maximum zoom
+    # the labels of the algorithms in the "Algorithms" frame, some's algorithm being Dijkstra's
+    ALGORITHM_LABELS = (("DFS", "DFS"), ("BFS", "BFS"), ("A*", "A*"), ("Greedy", "Greedy"), ("Dijkstra", "some"),
+                        ("JPS", "JPS"), ("HPA*", "HPA*"), ("Bi-BFS", "Bi-BFS"), ("Bi-Dijkstra", "Bi-Dijkstra"), ("Bi-A*", "Bi-A*"))
+    MAZE_GENERATORS = mazes.GENERATORS  # the algorithms that create the random mazes
 
     MSG_DRAW_AND_SELECT = "\"Paint\" obstacles, then click 'Real-Time' or 'Step-by-Step' or 'Animation'"
     MSG_SELECT_STEP_BY_STEP_ETC = "Click 'Step-by-Step' or 'Animation' or 'Clear'"
     MSG_NO_SOLUTION = "There is no path to the target !!!"
+    MSG_MAZE_SEED = "Maze of seed %d, type it in 'Seed' to create it again"
+    MSG_SEARCHING = "Searching..."
+    MSG_SEARCH_FAILED = "The search failed: %s"
+    MSG_ANIMATION = "Animation: %.1f frames/sec, %.0f nodes/sec"
+    MSG_REPLAY = "Replay of %s: step %d of %d"
+    POLL_DELAY = 20  # the delay between checks for the result of a background search (in msec)
+    FRAME_RATE = 30  # the frames per second of Animation mode
+    FRAME_BUDGET = 0.6  # the part of a frame that Animation mode may spend expanding nodes
 
     def __init__(self, maze):
         """Constructor"""
@@ -193,10 +169,29 @@ class Maze51:
         self.columns = 41  # the number of columns of the grid
         self.square_size = int(500 / self.rows)  # the cell size in pixels
         self.arrow_size = int(self.square_size / 2)  # the size of the tips of the arrow pointing the predecessor cell
-
-        self.openSet = []  # the OPEN SET
-        self.closedSet = []  # the CLOSED SET
-        self.graph = []  # the set of vertices of the graph to be explored by some's algorithm
+        self.top_row = self.left_col = 0  # the grid cell shown at the top-left corner of the viewport
+        self.view_rows = self.view_cols = 0  # the number of rows and columns shown in the viewport
+        self.pan_start = None  # the mouse position and viewport corner where panning started
+
+        self.search = None  # the headless search driven by the user interface
+        self.adjacency = None  # the neighbor tables of the grid, shared by successive searches
+        self.replanner = None  # the incremental planner of Real-Time mode, kept between edits
+        self.results = solver.ResultCache()  # the completed searches, by grid, robot, target and options
+        self.gridHash = None  # the hash of the obstacles of the grid, None if they changed since it was computed
+        self.worker = worker.SearchWorker()  # runs the searches of Real-Time mode off the event loop
+        self.job = None  # the number of the background search whose result is awaited
+        self.polling = False  # flag that poll_search() is scheduled
+        self.stats = None  # the statistics of the current search
+        self.statsWindow = None  # the window of the statistics panel, when shown
+        self.mazeCache = mazes.MazeCache()  # the generated mazes, kept on disk by generator, size and seed
+        self.mazeSeed = None  # the seed of the maze on the grid, saved with it
+        self.recorder = None  # records the current search when "Record searches" is checked
+        self.trace = None  # the trace of the last search recorded or opened
+        self.player = None  # the position of the replay in the trace, while replaying
+        self.replayWindow = None  # the window of the replay controls, while replaying
+        self.replaying = False  # flag that the replay is playing
+        self.routeShown = False  # flag that the replay shows the route found
+        self.stepsDue = 0.0  # the steps the replay has to move to keep up with its speed
 
         self.robotStart = self.Cell(self.rows - 2, 1)  # the initial position of the robot
         self.targetPos = self.Cell(1, self.columns - 2)  # the position of the target
@@ -208,18 +203,42 @@ class Maze51:
         self.endOfSearch = False  # flag that the search came to an end
         self.animation = False  # flag that the animation is running
         self.delay = 500  # time delay of animation (in msec)
+        self.nodesDue = 0.0  # the nodes the animation has to expand to keep up with the delay
+        self.lastFrame = self.firstFrame = 0.0  # the times of the last and first frames of the animation
         self.expanded = 0  # the number of nodes that have been expanded
         self.selected_algo = "DFS"  # DFS is initially selected
-        self.array = numpy.array([0] * (83 * 83))
         self.cur_row = self.cur_col = self.cur_val = 0
+        self.renderer = None  # draws the grid on the canvas
         app_highlight_font = font.Font(app, family='Helvetica', size=10, weight='bold')
         ##########################################
         #   the widgets of the user interface    #
         ##########################################
+        menu_bar = Menu(app)
+        file_menu = Menu(menu_bar, tearoff=0)
+        file_menu.add_command(label="Open grid...", accelerator="Ctrl+O", command=self.open_click)
+        file_menu.add_command(label="Save grid...", accelerator="Ctrl+S", command=self.save_click)
+        file_menu.add_separator()
+        file_menu.add_command(label="Open trace...", command=self.open_trace_click)
+        file_menu.add_command(label="Save trace...", command=self.save_trace_click)
+        file_menu.add_separator()
+        file_menu.add_command(label="Export search metrics...", command=self.export_metrics_click)
+        menu_bar.add_cascade(label="File", menu=file_menu)
+        view_menu = Menu(menu_bar, tearoff=0)
+        self.showStats = IntVar()
+        view_menu.add_checkbutton(label="Search statistics", variable=self.showStats, command=self.toggle_stats)
+        view_menu.add_separator()
+        self.recordSearches = IntVar()
+        view_menu.add_checkbutton(label="Record searches", variable=self.recordSearches)
+        view_menu.add_command(label="Replay last search", command=self.replay_click)
+        menu_bar.add_cascade(label="View", menu=view_menu)
+        app.config(menu=menu_bar)
+        app.bind("<Control-o>", lambda event: self.open_click())
+        app.bind("<Control-s>", lambda event: self.save_click())
+
         self.message = Label(app, text=self.MSG_DRAW_AND_SELECT, width=55, anchor='center',font=('Helvetica', 12), fg="BLUE")
         self.message.place(x=5, y=510)
 
-        rows_lbl = Label(app, text="# of rows (5-83):", width=16, anchor='e', font=("Helvetica", 9))
+        rows_lbl = Label(app, text="# of rows (5-%d):" % self.MAX_SIZE, width=16, anchor='e', font=("Helvetica", 9))
         rows_lbl.place(x=530, y=5)
 
         validate_rows_cmd = (app.register(self.validate_rows), '%P')
@@ -227,10 +246,10 @@ class Maze51:
 
         self.rows_var = StringVar()
         self.rows_var.set(41)
-        self.rowsSpinner = Spinbox(app, width=3, from_=5, to=83, textvariable=self.rows_var, validate='focus',validatecommand=validate_rows_cmd, invalidcommand=invalid_rows_cmd)
+        self.rowsSpinner = Spinbox(app, width=4, from_=5, to=self.MAX_SIZE, textvariable=self.rows_var, validate='focus',validatecommand=validate_rows_cmd, invalidcommand=invalid_rows_cmd)
         self.rowsSpinner.place(x=652, y=5)
 
-        cols_lbl = Label(app, text="# of columns (5-83):", width=16, anchor='e', font=("Helvetica", 9))
+        cols_lbl = Label(app, text="# of columns (5-%d):" % self.MAX_SIZE, width=16, anchor='e', font=("Helvetica", 9))
         cols_lbl.place(x=530, y=35)
 
         validate_cols_cmd = (app.register(self.validate_cols), '%P')
@@ -238,7 +257,7 @@ class Maze51:
 
         self.cols_var = StringVar()
         self.cols_var.set(41)
-        self.colsSpinner = Spinbox(app, width=3, from_=5, to=83, textvariable=self.cols_var, validate='focus',validatecommand=validate_cols_cmd, invalidcommand=invalid_cols_cmd)
+        self.colsSpinner = Spinbox(app, width=4, from_=5, to=self.MAX_SIZE, textvariable=self.cols_var, validate='focus',validatecommand=validate_cols_cmd, invalidcommand=invalid_cols_cmd)
         self.colsSpinner.place(x=652, y=35)
 
         self.buttons = list()
@@ -264,13 +283,21 @@ class Maze51:
         self.frame = LabelFrame(app, text="Algorithms", width=170, height=100)
         self.frame.place(x=515, y=300)
         self.radio_buttons = list()
-        radio_buttons_tool_tips = (" ", " ", " ", "Greedy search algorithm", " ")
-
-        btn = Radiobutton(self.frame, text="Best First Search", font=app_highlight_font, value=4,command=partial(self.select_algo, "Greedy"))
-        btn.place(x=10 if 0 % 2 == 0 else 90, y=int(0 / 2) * 25)
-        self.CreateToolTip(btn, radio_buttons_tool_tips[0])
-        btn.deselect()
-        self.radio_buttons.append(btn)
+        radio_buttons_tool_tips = ("Depth first search", "Breadth first search", "A* search algorithm",
+                                   "Greedy search algorithm", "Dijkstra's algorithm",
+                                   "Jump Point Search: A* that jumps along straight and diagonal lines",
+                                   "Hierarchical A* over clusters of the grid, fast but not always the shortest path",
+                                   "Breadth first search from the robot and the target, meeting in the middle",
+                                   "Dijkstra's algorithm from the robot and the target, meeting in the middle",
+                                   "A* from the robot and the target, meeting in the middle")
+        radio_font = font.Font(app, family='Helvetica', size=8, weight='bold')
+        for i, (label, algorithm) in enumerate(self.ALGORITHM_LABELS):
+            btn = Radiobutton(self.frame, text=label, font=radio_font, value=i + 1, pady=0,
+                              command=partial(self.select_algo, algorithm))
+            btn.place(x=5 if i % 2 == 0 else 85, y=int(i / 2) * 16)
+            self.CreateToolTip(btn, radio_buttons_tool_tips[i])
+            btn.deselect()
+            self.radio_buttons.append(btn)
         self.radio_buttons[0].select()
 
         self.diagonal = IntVar()
@@ -288,15 +315,35 @@ class Maze51:
         for i, memo in enumerate(("Robot", "Target", "Frontier", "Closed set")):
             label = Label(app, text=memo, width=8, anchor='center', fg=memo_colors[i], font=("Helvetica", 11))
             label.place(x=515 if i % 2 == 0 else 605, y=460 + int(i / 2) * 20)
+
+        generator_lbl = Label(app, text="Maze:", width=6, anchor='e', font=("Helvetica", 9))
+        generator_lbl.place(x=515, y=500)
+        self.mazeGenerator = StringVar()
+        self.mazeGenerator.set(self.MAZE_GENERATORS[0])
+        self.generatorSpinner = Spinbox(app, width=13, values=self.MAZE_GENERATORS, state='readonly', textvariable=self.mazeGenerator)
+        self.generatorSpinner.place(x=565, y=500)
+        self.CreateToolTip(self.generatorSpinner, "Growing tree: long corridors; Eller: generated row by row, in constant memory")
+
+        seed_lbl = Label(app, text="Seed:", width=6, anchor='e', font=("Helvetica", 9))
+        seed_lbl.place(x=515, y=522)
+        self.seed_var = StringVar()
+        self.seedEntry = Entry(app, width=15, textvariable=self.seed_var)
+        self.seedEntry.place(x=565, y=522)
+        self.CreateToolTip(self.seedEntry, "The seed of the next maze, a random one if empty")
         self.canvas = Canvas(app, bd=0, highlightthickness=0)
         self.canvas.bind("<Button-1>", self.left_click)
         self.canvas.bind("<B1-Motion>", self.drag)
+        self.canvas.bind("<Button-3>", self.start_pan)
+        self.canvas.bind("<B3-Motion>", self.pan)
+        self.canvas.bind("<MouseWheel>", self.zoom)  # Windows and macOS
+        self.canvas.bind("<Button-4>", self.zoom)  # X11 wheel up
+        self.canvas.bind("<Button-5>", self.zoom)  # X11 wheel down
         self.initialize_grid(False)
 
     def validate_rows(self, entry):
         try:
             value = int(entry)
-            valid = value in range(5, 84)
+            valid = value in range(5, self.MAX_SIZE + 1)
         except ValueError:
             valid = False
         if not valid:
@@ -310,7 +357,7 @@ class Maze51:
     def validate_cols(self, entry):
         try:
             value = int(entry)
-            valid = value in range(5, 84)
+            valid = value in range(5, self.MAX_SIZE + 1)
         except ValueError:
             valid = False
         if not valid:
@@ -340,33 +387,29 @@ class Maze51:
 
     def left_click(self, event):
         """Handles clicks of left mouse button as we add or remove obstacles"""
-        row = int(event.y / self.square_size)
-        col = int(event.x / self.square_size)
+        row, col = self.cell_at(event)
         if row in range(self.rows) and col in range(self.columns):
             if True if self.realTime else (not self.found and not self.searching):
                 if self.realTime:
+                    self.cancel_search()
                     self.fill_grid()
                 self.cur_row = row
                 self.cur_col = col
                 self.cur_val = self.grid[row][col]
                 if self.cur_val == self.EMPTY:
-                    self.grid[row][col] = self.OBST
-                    self.paint_cell(row, col, "BLACK")
+                    self.set_obstacle(row, col, True)
                 if self.cur_val == self.OBST:
-                    self.grid[row][col] = self.EMPTY
-                    self.paint_cell(row, col, "WHITE")
-                if self.realTime and self.selected_algo == "some":
-                    self.initialize_some()
+                    self.set_obstacle(row, col, False)
             if self.realTime:
                 self.real_Time_action()
 
     def drag(self, event):
         """Handles mouse movements as we "paint" obstacles or move the robot and/or target."""
-        row = int(event.y / self.square_size)
-        col = int(event.x / self.square_size)
+        row, col = self.cell_at(event)
         if row in range(self.rows) and col in range(self.columns):
             if True if self.realTime else (not self.found and not self.searching):
                 if self.realTime:
+                    self.cancel_search()
                     self.fill_grid()
                 if self.Cell(row, col) != self.Cell(self.cur_row, self.cur_col) and \
                         self.cur_val in [self.ROBOT, self.TARGET]:
@@ -380,6 +423,8 @@ class Maze51:
                             self.robotStart.col = col
                             self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
                             self.paint_cell(self.robotStart.row, self.robotStart.col, "RED")
+                            if self.replanner is not None:
+                                self.replanner.move_start(row, col)
                         else:
                             self.grid[self.targetPos.row][self.targetPos.col] = self.EMPTY
                             self.paint_cell(self.targetPos.row, self.targetPos.col, "WHITE")
@@ -387,75 +432,154 @@ class Maze51:
                             self.targetPos.col = col
                             self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
                             self.paint_cell(self.targetPos.row, self.targetPos.col, "GREEN")
+                            if self.replanner is not None:
+                                self.replanner.move_target(row, col)
                         self.cur_row = row
                         self.cur_col = col
                         self.cur_val = self.grid[row][col]
                 elif self.grid[row][col] != self.ROBOT and self.grid[row][col] != self.TARGET:
-                    self.grid[row][col] = self.OBST
-                    self.paint_cell(row, col, "BLACK")
-                if self.realTime and self.selected_algo == "some":
-                    self.initialize_some()
+                    self.set_obstacle(row, col, True)
             if self.realTime:
                 self.real_Time_action()
 
+    def cell_at(self, event):
+        """Returns the (row, col) of the grid cell under the mouse"""
+        return self.top_row + int(event.y / self.square_size), self.left_col + int(event.x / self.square_size)
+
+    def start_pan(self, event):
+        """Handles clicks of the right mouse button, which start panning the viewport"""
+        self.pan_start = (event.x, event.y, self.top_row, self.left_col)
+
+    def pan(self, event):
+        """Handles mouse movements with the right button pressed, which drag the grid in the viewport"""
+        if self.pan_start is None:
+            return
+        x, y, top, left = self.pan_start
+        self.move_view(top - int((event.y - y) / self.square_size), left - int((event.x - x) / self.square_size))
+
+    def zoom(self, event):
+        """Handles the mouse wheel, which zooms in or out around the cell under the mouse"""
+        zoom_in = getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0
+        square_size = min(self.square_size * 2, self.MAX_SQUARE) if zoom_in else max(self.square_size // 2, self.fit_square_size())
+        if square_size == self.square_size:
+            return
+        row, col = self.cell_at(event)
+        self.square_size = square_size
+        self.move_view(row - int(event.y / square_size), col - int(event.x / square_size), True)
+
+    def fit_square_size(self):
+        """Returns the cell size that fits the whole grid in the viewport, or 1 pixel for larger grids"""
+        return max(int(self.VIEW_SIZE / max(self.rows, self.columns)), 1)
+
+    def move_view(self, top_row, left_col, resized=False):
+        """Shows the grid from the given top-left cell, keeping the viewport inside the grid"""
+        view_rows = min(self.rows, int(self.VIEW_SIZE / self.square_size))
+        view_cols = min(self.columns, int(self.VIEW_SIZE / self.square_size))
+        top_row = min(max(top_row, 0), self.rows - view_rows)
+        left_col = min(max(left_col, 0), self.columns - view_cols)
+        if not resized and (top_row, left_col) == (self.top_row, self.left_col):
+            return
+        self.top_row, self.left_col = top_row, left_col
+        self.view_rows, self.view_cols = view_rows, view_cols
+        self.arrow_size = int(self.square_size / 2)
+        self.canvas.configure(width=self.view_cols * self.square_size + 1, height=self.view_rows * self.square_size + 1)
+        self.create_renderer()
+        self.repaint()
+        if self.endOfSearch and self.drawArrows.get():
+            self.draw_arrows()
+
+    def set_obstacle(self, row, col, wall):
+        """Paints or erases an obstacle and patches the neighbor tables around it"""
+        self.grid[row][col] = self.OBST if wall else self.EMPTY
+        self.gridHash = None
+        self.paint_cell(row, col, "BLACK" if wall else "WHITE")
+        if self.replanner is not None:
+            self.replanner.set_wall(row, col, wall)
+        elif self.adjacency is not None:
+            self.adjacency.set_wall(row, col, wall)
+
     def initialize_grid(self, make_maze):
         """Creates a new clean grid or a new maze"""
+        self.cancel_search()
+        self.end_replay()
         self.rows = int(self.rowsSpinner.get())
         self.columns = int(self.colsSpinner.get())
         if make_maze and self.rows % 2 == 0:
             self.rows -= 1
         if make_maze and self.columns % 2 == 0:
             self.columns -= 1
-        self.square_size = int(500 / (self.rows if self.rows > self.columns else self.columns))
-        self.arrow_size = int(self.square_size / 2)
-        self.grid = self.array[:self.rows * self.columns]
-        self.grid = self.grid.reshape(self.rows, self.columns)
-        self.canvas.configure(width=self.columns * self.square_size + 1, height=self.rows * self.square_size + 1)
+        self.grid = numpy.zeros((self.rows, self.columns), dtype=numpy.int8)
+        self.square_size = self.fit_square_size()
         self.canvas.place(x=10, y=10)
-        self.canvas.create_rectangle(0, 0, self.columns * self.square_size + 1,self.rows * self.square_size + 1, width=0, fill="DARK GREY")
-        for r in list(range(self.rows)):
-            for c in list(range(self.columns)):
-                self.grid[r][c] = self.EMPTY
+        self.move_view(0, 0, True)
         self.robotStart = self.Cell(self.rows - 2, 1)
         self.targetPos = self.Cell(1, self.columns - 2)
         self.fill_grid()
         if make_maze:
-            maze = self.MyMaze(int(self.rows / 2), int(self.columns / 2))
-            for x in range(maze.gridDimensionX):
-                for y in range(maze.gridDimensionY):
-                    if maze.mazeGrid[x][y] == 'X':  # maze.wall_char:
-                        self.grid[x][y] = self.OBST
+            height, width = self.rows // 2, self.columns // 2
+            generator, seed = self.mazeGenerator.get(), self.maze_seed()
+            try:
+                maze = self.mazeCache.get(generator, height, width, seed)
+            except OSError:  # no writable cache directory
+                maze = mazes.generate_rows(generator, height, width, seed)
+            # stamp the rows one at a time from the cached file, mapped into memory, instead of unpacking the whole maze
+            for row, states in enumerate(mazes.stamp_rows(maze, width, self.OBST)):
+                self.grid[row][states == self.OBST] = self.OBST
+            self.message.configure(text=self.MSG_MAZE_SEED % seed)
+        self.mazeSeed = seed if make_maze else None
+        self.adjacency = None
+        self.gridHash = None
+        self.repaint()
+
+    def load_grid(self, grid_file):
+        """Replaces the grid with the one of a grid file"""
+        self.rows_var.set(grid_file.rows)
+        self.cols_var.set(grid_file.columns)
+        self.initialize_grid(False)
+        # the window keeps the state of every cell, a byte each, unlike the batch solver which only builds the tables
+        self.grid[...] = grid_file.states(self.OBST, self.EMPTY)
+        self.gridHash = None
+        self.robotStart = self.Cell(*grid_file.robot)
+        self.targetPos = self.Cell(*grid_file.target)
+        self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
+        self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
+        self.mazeSeed = grid_file.seed
+        # the searches start from the tables built from the mapped walls
+        self.adjacency = grid_file.adjacency()
+        self.adjacency.set_wall(self.robotStart.row, self.robotStart.col, False)
+        self.adjacency.set_wall(self.targetPos.row, self.targetPos.col, False)
         self.repaint()
 
+    def maze_seed(self):
+        """Returns the seed typed by the user, or a random one"""
+        try:
+            return int(self.seed_var.get())
+        except ValueError:
+            if self.seed_var.get().strip():
+                app.bell()
+            return random.randrange(2 ** 32)
+
     def fill_grid(self):
         """Gives initial values ​​for the cells in the grid."""
         if self.searching or self.endOfSearch:
-            for r in list(range(self.rows)):
-                for c in list(range(self.columns)):
-                    if self.grid[r][c] in [self.FRONTIER, self.CLOSED, self.ROUTE]:
-                        self.grid[r][c] = self.EMPTY
-                    if self.grid[r][c] == self.ROBOT:
-                        self.robotStart = self.Cell(r, c)
+            self.grid[numpy.isin(self.grid, [self.FRONTIER, self.CLOSED, self.ROUTE])] = self.EMPTY
+            robot = numpy.argwhere(self.grid == self.ROBOT)
+            if len(robot):
+                self.robotStart = self.Cell(*robot[0].tolist())
             self.searching = False
         else:
-            for r in list(range(self.rows)):
-                for c in list(range(self.columns)):
-                    self.grid[r][c] = self.EMPTY
+            self.grid[...] = self.EMPTY
+            self.adjacency = None
+            self.gridHash = None
             self.robotStart = self.Cell(self.rows - 2, 1)
             self.targetPos = self.Cell(1, self.columns - 2)
-        if self.selected_algo in ["A*", "Greedy"]:
-            self.robotStart.g = 0
-            self.robotStart.h = 0
-            self.robotStart.f = 0
         self.expanded = 0
         self.found = False
         self.searching = False
         self.endOfSearch = False
 
-        self.openSet.clear()
-        self.closedSet.clear()
-        self.openSet = [self.robotStart]
-        self.closedSet = []
+        self.search = None
+        self.recorder = None
 
         self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
         self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
@@ -463,34 +587,26 @@ class Maze51:
 
         self.repaint()
 
+    def create_renderer(self):
+        """Picks the renderer for the viewport: canvas rectangles, or a single image when many cells are visible"""
+        renderer = render.ImageRenderer if self.view_rows * self.view_cols > self.IMAGE_CELLS else render.ItemRenderer
+        if not isinstance(self.renderer, renderer):
+            self.renderer = renderer(self.canvas, self.COLORS)
+        self.renderer.reset((self.top_row, self.left_col, self.view_rows, self.view_cols, self.square_size))
+
     def repaint(self):
-        """Repaints the grid"""
-        color = ""
-        for r in list(range(self.rows)):
-            for c in list(range(self.columns)):
-                if self.grid[r][c] == self.EMPTY:
-                    color = "WHITE"
-                elif self.grid[r][c] == self.ROBOT:
-                    color = "RED"
-                elif self.grid[r][c] == self.TARGET:
-                    color = "GREEN"
-                elif self.grid[r][c] == self.OBST:
-                    color = "BLACK"
-                elif self.grid[r][c] == self.FRONTIER:
-                    color = "BLUE"
-                elif self.grid[r][c] == self.CLOSED:
-                    color = "CYAN"
-                elif self.grid[r][c] == self.ROUTE:
-                    color = "YELLOW"
-                self.paint_cell(r, c, color)
+        """Repaints the cells whose state differs from the color they show and removes the arrows"""
+        self.canvas.delete("arrows")
+        self.renderer.repaint(self.grid)
 
     def paint_cell(self, row, col, color):
-        self.canvas.create_rectangle(1 + col * self.square_size, 1 + row * self.square_size,1 + (col + 1) * self.square_size - 1, 1 + (row + 1) * self.square_size - 1,width=0, fill=color)
+        self.renderer.paint(row, col, self.COLOR_STATES[color])
 
     def reset_click(self):
         """ Action performed when user clicks "New grid" button """
         self.animation = False
         self.realTime = False
+        self.replanner = None
         for but in self.buttons:
             but.configure(state="normal")
         self.buttons[3].configure(fg="BLACK")  # Real-Time button
@@ -505,6 +621,7 @@ class Maze51:
         """Action performed when user clicks "Maze" button"""
         self.animation = False
         self.realTime = False
+        self.replanner = None
         for but in self.buttons:
             but.configure(state="normal")
         self.buttons[3].configure(fg="BLACK")  # Real-Time button
@@ -515,10 +632,262 @@ class Maze51:
         self.drawArrowsBtn.configure(state="normal")
         self.initialize_grid(True)
 
+    def open_click(self):
+        """Action performed when user selects "Open grid..." """
+        path = filedialog.askopenfilename(parent=app, title="Open grid", defaultextension=gridfile.EXTENSION,
+                                          filetypes=[("Grids", "*" + gridfile.EXTENSION), ("All files", "*")])
+        if not path:
+            return
+        try:
+            grid_file = gridfile.load(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open grid", str(e))
+            return
+        if grid_file.rows > self.MAX_SIZE or grid_file.columns > self.MAX_SIZE or min(grid_file.rows, grid_file.columns) < 5:
+            messagebox.showerror("Open grid", "The grid is %d x %d, rows and columns must be 5-%d" %
+                                 (grid_file.rows, grid_file.columns, self.MAX_SIZE))
+            return
+        self.animation = False
+        self.realTime = False
+        self.replanner = None
+        for but in self.buttons:
+            but.configure(state="normal")
+        self.buttons[3].configure(fg="BLACK")  # Real-Time button
+        self.slider.configure(state="normal")
+        for but in self.radio_buttons:
+            but.configure(state="normal")
+        self.diagonalBtn.configure(state="normal")
+        self.drawArrowsBtn.configure(state="normal")
+        self.load_grid(grid_file)
+
+    def save_click(self):
+        """Action performed when user selects "Save grid..." """
+        path = filedialog.asksaveasfilename(parent=app, title="Save grid", defaultextension=gridfile.EXTENSION,
+                                            filetypes=[("Grids", "*" + gridfile.EXTENSION), ("All files", "*")])
+        if not path:
+            return
+        try:
+            gridfile.save(path, self.grid, (self.robotStart.row, self.robotStart.col),
+                          (self.targetPos.row, self.targetPos.col), self.mazeSeed, self.OBST)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Save grid", str(e))
+
+    def export_metrics_click(self):
+        """Action performed when user selects "Export search metrics..." """
+        if self.stats is None:
+            messagebox.showinfo("Export search metrics", "There is no search to export yet")
+            return
+        path = filedialog.asksaveasfilename(parent=app, title="Export search metrics", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if not path:
+            return
+        try:
+            metrics.write(path, [({"rows": str(self.rows), "columns": str(self.columns)}, self.stats.as_dict())])
+        except OSError as e:
+            messagebox.showerror("Export search metrics", str(e))
+
+    def toggle_stats(self):
+        """Shows or hides the statistics panel"""
+        if not self.showStats.get():
+            if self.statsWindow is not None:
+                self.statsWindow.destroy()
+                self.statsWindow = None
+            return
+        self.statsWindow = Toplevel(app)
+        self.statsWindow.title("Search statistics")
+        self.statsWindow.resizable(False, False)
+        self.statsWindow.protocol("WM_DELETE_WINDOW", self.close_stats)
+        self.statsLabel = Label(self.statsWindow, width=30, justify='left', anchor='nw', font=("Courier", 10))
+        self.statsLabel.pack(padx=10, pady=10)
+        self.update_stats()
+
+    def close_stats(self):
+        self.showStats.set(0)
+        self.toggle_stats()
+
+    def update_stats(self):
+        """Shows the statistics of the current search in the statistics panel, if shown"""
+        if self.statsWindow is not None:
+            self.statsLabel.configure(text=self.stats.text() if self.stats is not None else "No search yet")
+
+    def open_trace_click(self):
+        """Action performed when user selects "Open trace..." """
+        path = filedialog.askopenfilename(parent=app, title="Open trace", defaultextension=replay.EXTENSION,
+                                          filetypes=[("Traces", "*" + replay.EXTENSION), ("All files", "*")])
+        if not path:
+            return
+        try:
+            trace = replay.Trace.load(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open trace", str(e))
+            return
+        if trace.rows > self.MAX_SIZE or trace.columns > self.MAX_SIZE or min(trace.rows, trace.columns) < 5:
+            messagebox.showerror("Open trace", "The grid is %d x %d, rows and columns must be 5-%d" %
+                                 (trace.rows, trace.columns, self.MAX_SIZE))
+            return
+        self.start_replay(trace)
+
+    def save_trace_click(self):
+        """Action performed when user selects "Save trace..." """
+        if self.trace is None:
+            messagebox.showinfo("Save trace", "There is no trace yet, check \"Record searches\" and run a search")
+            return
+        path = filedialog.asksaveasfilename(parent=app, title="Save trace", defaultextension=replay.EXTENSION,
+                                            filetypes=[("Traces", "*" + replay.EXTENSION), ("All files", "*")])
+        if not path:
+            return
+        try:
+            self.trace.save(path)
+        except OSError as e:
+            messagebox.showerror("Save trace", str(e))
+
+    def replay_click(self):
+        """Action performed when user selects "Replay last search" """
+        if self.trace is None:
+            messagebox.showinfo("Replay", "There is no trace yet, check \"Record searches\" and run a search")
+            return
+        self.start_replay(self.trace)
+
+    def start_replay(self, trace):
+        """Puts the grid of a trace in place and shows the replay controls at its first step"""
+        self.clear_click()
+        self.rows_var.set(trace.rows)
+        self.cols_var.set(trace.columns)
+        self.initialize_grid(False)
+        self.grid[...] = self.EMPTY
+        self.grid[trace.walls()] = self.OBST
+        self.robotStart = self.Cell(*trace.start)
+        self.targetPos = self.Cell(*trace.target)
+        self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
+        self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
+        self.adjacency = None
+        self.gridHash = None
+        self.repaint()
+        for i, (label, algorithm) in enumerate(self.ALGORITHM_LABELS):
+            if algorithm == trace.algorithm:
+                self.radio_buttons[i].select()
+                self.selected_algo = algorithm
+        self.diagonal.set(int(trace.diagonal))
+        # the grid shows the replay until 'Clear'
+        self.searching = self.endOfSearch = True
+        for but in self.buttons[3:]:  # Real-Time, Step-by-Step and Animation buttons
+            but.configure(state="disabled")
+        self.trace = trace
+        self.player = replay.Player(trace)
+        self.routeShown = False
+        self.replayWindow = Toplevel(app)
+        self.replayWindow.title("Replay")
+        self.replayWindow.resizable(False, False)
+        self.replayWindow.protocol("WM_DELETE_WINDOW", self.end_replay)
+        self.replayScale = Scale(self.replayWindow, orient=HORIZONTAL, length=320, from_=0, to=trace.steps,
+                                 showvalue=1, command=lambda value: self.replay_seek(int(float(value))))
+        self.replayScale.pack(padx=10, pady=5)
+        controls = Frame(self.replayWindow)
+        controls.pack(padx=10)
+        for text, command in (("|<", lambda: self.replay_seek(0)),
+                              ("<", lambda: self.replay_seek(self.player.step - 1)),
+                              ("Play", self.replay_play),
+                              (">", lambda: self.replay_seek(self.player.step + 1)),
+                              (">|", lambda: self.replay_seek(trace.steps))):
+            btn = Button(controls, text=text, width=5, command=command)
+            btn.pack(side=LEFT)
+            if text == "Play":
+                self.playBtn = btn
+        self.replaySpeed = Scale(self.replayWindow, orient=HORIZONTAL, length=320, from_=1, to=5000,
+                                 showvalue=1, label="Steps/sec")
+        self.replaySpeed.set(100)
+        self.replaySpeed.pack(padx=10, pady=5)
+        self.replayWindow.bind("<Left>", lambda event: self.replay_seek(self.player.step - 1))
+        self.replayWindow.bind("<Right>", lambda event: self.replay_seek(self.player.step + 1))
+        self.message.configure(text=self.MSG_REPLAY % (trace.algorithm, 0, trace.steps))
+
+    def end_replay(self):
+        """Stops the replay and closes its controls, leaving the grid as shown until 'Clear'"""
+        self.replaying = False
+        self.player = None
+        if self.replayWindow is not None:
+            self.replayWindow.destroy()
+            self.replayWindow = None
+
+    def replay_seek(self, step):
+        """Shows the replayed search at a step, repainting only the cells that changed"""
+        if self.player is None:
+            return
+        trace = self.player.trace
+        step = min(max(step, 0), trace.steps)
+        if step == self.player.step:
+            return
+        cells = self.player.seek(step)
+        if self.routeShown:
+            cells = numpy.union1d(cells, trace.path)
+            self.routeShown = False
+        for cell in cells.tolist():
+            r, c = divmod(cell, trace.columns)
+            self.grid[r][c] = self.player.states[cell] or self.EMPTY
+            self.paint_cell(r, c, self.COLORS[self.grid[r][c]])
+        if step == trace.steps and len(trace.path):
+            for cell in trace.path.tolist():
+                r, c = divmod(cell, trace.columns)
+                self.grid[r][c] = self.ROUTE
+                self.paint_cell(r, c, "YELLOW")
+            self.routeShown = True
+        self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
+        self.paint_cell(self.targetPos.row, self.targetPos.col, "GREEN")
+        self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
+        self.paint_cell(self.robotStart.row, self.robotStart.col, "RED")
+        self.replayScale.set(step)
+        if step == trace.steps:
+            self.message.configure(text="Nodes expanded: {0}, Steps: {1}".format(trace.expanded, max(len(trace.path) - 1, 0))
+                                   if len(trace.path) else self.MSG_NO_SOLUTION)
+        else:
+            self.message.configure(text=self.MSG_REPLAY % (trace.algorithm, step, trace.steps))
+        self.replay_arrows()
+
+    def replay_arrows(self):
+        """Redraws the arrows of the replayed search, unless it is playing"""
+        self.canvas.delete("arrows")
+        if self.drawArrows.get() and not self.replaying:
+            self.draw_arrows()
+
+    def replay_play(self):
+        """Starts or pauses the replay, from its first step when it is at the end"""
+        if self.player is None:
+            return
+        self.replaying = not self.replaying
+        self.playBtn.configure(text="Pause" if self.replaying else "Play")
+        if self.replaying:
+            if self.player.step == self.player.trace.steps:
+                self.replay_seek(0)
+            self.stepsDue = 0.0
+            self.lastFrame = time.perf_counter()
+            self.canvas.after(int(1000 / self.FRAME_RATE), self.replay_action)
+        else:
+            self.replay_arrows()
+
+    def replay_action(self):
+        """Draws a frame of the replay, moving by the steps due at the speed of the replay since the last frame"""
+        if not self.replaying or self.player is None:
+            return
+        now = time.perf_counter()
+        self.stepsDue += (now - self.lastFrame) * self.replaySpeed.get()
+        self.lastFrame = now
+        steps = int(self.stepsDue)
+        self.stepsDue -= steps
+        self.replay_seek(self.player.step + steps)
+        if self.player.step == self.player.trace.steps:
+            self.replaying = False
+            self.playBtn.configure(text="Play")
+            self.replay_arrows()
+            return
+        self.canvas.after(int(1000 / self.FRAME_RATE), self.replay_action)
+
     def clear_click(self):
         """  Action performed when user clicks "Clear" button """
+        self.cancel_search()
+        self.end_replay()
         self.animation = False
         self.realTime = False
+        self.replanner = None
         for but in self.buttons:
             but.configure(state="normal")
         self.buttons[3].configure(fg="BLACK")  # Real-Time button
@@ -535,28 +904,124 @@ class Maze51:
             return
         self.realTime = True
         self.searching = True
-        # The some's initialization should be done just before the start of search, because obstacles must be in place.
-        if self.selected_algo == "some":
-            self.initialize_some()
         self.buttons[3].configure(fg="RED")  # Real-Time button
         self.slider.configure(state="disabled")
         for but in self.radio_buttons:
             but.configure(state="disabled")
         self.diagonalBtn.configure(state="disabled")
         self.drawArrowsBtn.configure(state="disabled")
+        # A* and some's algorithm find shortest paths, which the incremental planner can repair after each edit.
+        if self.selected_algo in solver.INCREMENTAL:
+            if self.adjacency is None:
+                self.adjacency = solver.Adjacency(self.grid)
+            self.replanner = solver.Replanner(self.grid, (self.robotStart.row, self.robotStart.col),
+                                              (self.targetPos.row, self.targetPos.col),
+                                              self.diagonal.get(), self.adjacency)
+            self.stats = metrics.SearchStats()
+            self.stats.attach(self.replanner)
         self.real_Time_action()
 
     def real_Time_action(self):
         """Action performed during real-time search"""
-        while not self.endOfSearch:
-            self.check_termination()
+        if self.replanner is not None:
+            self.replan()
+            return
+        # the same search on the same obstacles, e.g. after 'Clear' or moving the robot back, is not run again
+        cached = self.results.get(self.result_key())
+        if cached is not None:
+            self.search, result, stats = cached
+            # a copy, so the cached statistics keep the painting of the first showing only
+            self.stats = stats.copy()
+            self.stats.seconds["painting"] = 0.0
+            self.show_result(result)
+            return
+        # the search runs on the live neighbor tables: every edit cancels it, and waits for it to stop, before
+        # patching them
+        if self.adjacency is None:
+            self.adjacency = solver.Adjacency(self.grid)
+        adjacency = self.adjacency
+        start, target = (self.robotStart.row, self.robotStart.col), (self.targetPos.row, self.targetPos.col)
+        algorithm, diagonal = self.selected_algo, self.diagonal.get()
+        record = self.recordSearches.get()
+
+        def job(cancelled):
+            search = solver.new_search(None, start, target, algorithm, diagonal, adjacency)
+            stats = metrics.SearchStats()
+            stats.attach(search)
+            recorder = replay.Recorder(adjacency.walls) if record else None
+            if recorder is not None:
+                recorder.attach(search)
+            while not search.done:
+                if cancelled():
+                    return None
+                search.step()
+            return search, search.result(), stats, recorder.trace() if recorder is not None else None
+        self.run_in_background(job)
+
+    def run_in_background(self, job):
+        """Hands a job returning (search, result, stats, trace) to the worker thread and waits for it without blocking"""
+        self.job = self.worker.submit(job)
+        self.searching = True
+        self.message.configure(text=self.MSG_SEARCHING)
+        if not self.polling:
+            self.polling = True
+            self.canvas.after(self.POLL_DELAY, self.poll_search)
+
+    def poll_search(self):
+        """Shows the result of the background search once it is available"""
+        if self.job is None:
+            self.polling = False
+            return
+        finished = self.worker.poll()
+        if finished is None or finished[0] != self.job:
+            self.canvas.after(self.POLL_DELAY, self.poll_search)
+            return
+        self.job = None
+        self.polling = False
+        if isinstance(finished[1], Exception):
+            self.message.configure(text=self.MSG_SEARCH_FAILED % (finished[1],))
+            return
+        self.search, result, self.stats, trace = finished[1]
+        if trace is not None:
+            self.trace = trace
+        self.show_result(result)
+
+    def cancel_search(self):
+        """Stops the background search, if any, before the grid or the replanner changes"""
+        self.worker.cancel()
+        self.job = None
+
+    def result_key(self):
+        """Returns the key of the current search in the cache of results"""
+        if self.gridHash is None:
+            self.gridHash = solver.walls_hash(self.grid)
+        return self.results.key(self.gridHash, (self.robotStart.row, self.robotStart.col),
+                                (self.targetPos.row, self.targetPos.col), self.selected_algo, self.diagonal.get())
+
+    def replan(self):
+        """Repairs the real-time search after an edit, in the background, and shows its result"""
+        replanner, stats = self.replanner, self.stats
+
+        def job(cancelled):
+            result = replanner.compute(cancelled)
+            return None if result is None else (replanner, result, stats, None)
+        self.run_in_background(job)
+
+    def show_result(self, result):
+        """Paints the CLOSED and OPEN SETs of a completed search, then its route"""
+        began = time.perf_counter()
+        grid = self.grid.reshape(-1)
+        for state, cells in ((self.CLOSED, result.closed), (self.FRONTIER, result.frontier)):
+            grid[cells[grid[cells] == self.EMPTY]] = state
+        self.stats.add_time("painting", time.perf_counter() - began)
+        self.expanded = result.expanded
+        self.found = result.found
+        self.end_search()
 
     def step_by_step_click(self):
         """Action performed when user clicks "Step-by-Step" button"""
         if self.found or self.endOfSearch:
             return
-        if not self.searching and self.selected_algo == "some":
-            self.initialize_some()
         self.animation = False
         self.searching = True
         self.message.configure(text=self.MSG_SELECT_STEP_BY_STEP_ETC)
@@ -570,8 +1035,6 @@ class Maze51:
     def animation_click(self):
         """Action performed when user clicks "Animation" button"""
         self.animation = True
-        if not self.searching and self.selected_algo == "some":
-            self.initialize_some()
         self.searching = True
         self.message.configure(text=self.MSG_SELECT_STEP_BY_STEP_ETC)
         self.buttons[3].configure(state="disabled")  # Real-Time button
@@ -580,429 +1043,175 @@ class Maze51:
         self.diagonalBtn.configure(state="disabled")
         self.drawArrowsBtn.configure(state="disabled")
         self.delay = self.slider.get()
+        self.nodesDue = 1.0
+        self.lastFrame = self.firstFrame = time.perf_counter()
         self.animation_action()
 
     def animation_action(self):
-        """ The action periodically performed during searching in animation mode """
-        if self.animation:
-            self.check_termination()
-            if self.endOfSearch:
-                return
-            self.canvas.after(self.delay, self.animation_action)
-
-    def check_termination(self):
+        """
+        Draws a frame of the animation: expands the nodes due since the last
+        frame, one per delay of the slider, or as many as fit in FRAME_BUDGET
+        of the frame with no delay, then paints the cells they changed at once.
+        """
+        if not self.animation or self.endOfSearch:
+            return
+        now = time.perf_counter()
+        self.delay = self.slider.get()
+        if self.delay:
+            self.nodesDue += (now - self.lastFrame) * 1000 / self.delay
+        self.lastFrame = now
+        deadline = now + self.FRAME_BUDGET / self.FRAME_RATE
+        while not self.endOfSearch and (self.nodesDue >= 1 or not self.delay):
+            self.nodesDue = max(self.nodesDue - 1, 0)
+            self.check_termination(False)
+            if time.perf_counter() > deadline:
+                self.nodesDue = min(self.nodesDue, 1.0)  # the nodes the frames cannot keep up with are dropped
+                break
+        if self.endOfSearch:
+            return
+        began = time.perf_counter()
+        self.renderer.repaint(self.grid)
+        self.stats.add_time("painting", time.perf_counter() - began)
+        self.stats.count_frame(time.perf_counter() - self.firstFrame)
+        stats = self.stats.as_dict()
+        self.message.configure(text=self.MSG_ANIMATION % (stats["frames_per_second"] or 0,
+                                                          stats["animation_nodes_per_second"] or 0))
+        if self.statsWindow is not None:
+            self.update_stats()
+        # wait for the next frame, or for the next node when it is due later
+        wait = 1 / self.FRAME_RATE if not self.delay else max(1 / self.FRAME_RATE, (1 - self.nodesDue) * self.delay / 1000)
+        self.canvas.after(int(1000 * wait), self.animation_action)
+
+    def start_search(self):
+        """ Hands the current grid to a new headless search. Obstacles must be in place. """
+        if self.adjacency is None:
+            self.adjacency = solver.Adjacency(self.grid)
+        self.search = solver.new_search(self.grid, (self.robotStart.row, self.robotStart.col),
+                                        (self.targetPos.row, self.targetPos.col),
+                                        self.selected_algo, self.diagonal.get(), self.adjacency)
+        self.stats = metrics.SearchStats()
+        self.stats.attach(self.search, step_blocks=True)  # the painting between the steps is not counted
+        # attached after the statistics, so the time spent recording is not counted as searching
+        self.recorder = replay.Recorder(self.grid == self.OBST) if self.recordSearches.get() else None
+        if self.recorder is not None:
+            self.recorder.attach(self.search)
+
+    def check_termination(self, paint=True):
         """ Checks if search is completed """
-        if (self.selected_algo == "some" and not self.graph) or \
-                self.selected_algo != "some" and not self.openSet:
-            self.endOfSearch = True
+        if self.search is None:
+            self.start_search()
+        if self.search.exhausted:
+            self.end_search()
+        else:
+            self.expand_node(paint)
+            if self.found:
+                self.end_search()
+
+    def end_search(self):
+        """ Shows the route if the target was found, otherwise that there is no solution """
+        self.endOfSearch = True
+        self.buttons[4].configure(state="disabled")  # Step-by-Step button
+        self.buttons[5].configure(state="disabled")  # Animation button
+        self.slider.configure(state="disabled")
+        began = time.perf_counter()
+        if self.found:
+            self.plot_route()
+        else:
             self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
             self.message.configure(text=self.MSG_NO_SOLUTION)
-            self.buttons[4].configure(state="disabled")  # Step-by-Step button
-            self.buttons[5].configure(state="disabled")  # Animation button
-            self.slider.configure(state="disabled")
             self.repaint()
             if self.drawArrows.get():
                 self.draw_arrows()
+        self.stats.add_time("painting", time.perf_counter() - began)
+        self.update_stats()
+        if self.recorder is not None:
+            self.trace = self.recorder.trace()
+            self.recorder = None
+        if not self.realTime or self.replanner is not None:
+            return  # only Real-Time looks up the cache of results
+        key = self.result_key()
+        if key not in self.results:
+            self.results.put(key, (self.search, self.search.result(), self.stats), self.rows * self.columns)
+
+    def expand_node(self, paint=True):
+        """ Lets the search expand a node and paints the cells that changed state, unless paint is False """
+        changes = self.search.step()
+        if paint:
+            began = time.perf_counter()
+            for r, c, state in changes:
+                self.grid[r][c] = state
+                self.paint_cell(r, c, self.COLORS[state])
+            self.stats.add_time("painting", time.perf_counter() - began)
         else:
-            self.expand_node()
-            if self.found:
-                self.endOfSearch = True
-                self.plot_route()
-                self.buttons[4].configure(state="disabled")  # Step-by-Step button
-                self.buttons[5].configure(state="disabled")  # Animation button
-                self.slider.configure(state="disabled")
-
-    def expand_node(self):
-        """ Expands a node and creates his successors """ # some's algorithm to handle separately
-        if self.selected_algo == "some": # 11: while Q is not empty:
-            if not self.graph:
-                return
-            # 12:  u := vertex in Q (graph) with smallest distance in dist[] ;
-            u = self.graph.pop(0)
-            self.closedSet.append(u)  # Add vertex u in closed set
-            if u == self.targetPos: # If target has been found ...
-                self.found = True
-                return
-            # Counts nodes that have expanded.
-            self.expanded += 1
-            # Update the color of the cell
-            self.grid[u.row][u.col] = self.CLOSED
-            self.paint_cell(u.row, u.col, "CYAN")
-            if u.dist == self.INFINITY:
-                # ... then there is no solution.
-                return
-            # Create the neighbors of u
-            neighbors = self.create_successors(u, False)
-            for v in neighbors:
-                alt = u.dist + self.dist_between(u, v)
-                # 21: if alt < dist[v]:
-                if alt < v.dist:
-                    # 22: dist[v] := alt ;
-                    v.dist = alt
-                    # 23: previous[v] := u ;
-                    v.prev = u
-                    # Update the color of the cell
-                    self.grid[v.row][v.col] = self.FRONTIER
-                    # paint the cell
-                    self.paint_cell(v.row, v.col, "BLUE")
-                    # 24: decrease-key v in Q;
-                    # (sort list of nodes with respect to dist)
-                    self.graph.sort(key=attrgetter("dist"))
-        # The handling of the other 2algorithms
-        else:
-            if self.selected_algo in ["DFS", "BFS"]:
-                current = self.openSet.pop(0)
-            else:
-                self.openSet.sort(key=attrgetter("f"))
-                current = self.openSet.pop(0)
-            # ... and add it to CLOSED SET.
-            self.closedSet.insert(0, current)
-            # Update the color of the cell
-            self.grid[current.row][current.col] = self.CLOSED
-            # paint the cell
-            self.paint_cell(current.row, current.col, "CYAN")
-            # If the selected node is the target ...
-            if current == self.targetPos:
-                # ... then terminate etc
-                last = self.targetPos
-                last.prev = current.prev
-                self.closedSet.append(last)
-                self.found = True
-                return
-            # Count nodes that have been expanded.
-            self.expanded += 1
-            successors = self.create_successors(current, False)
-            for cell in successors:
-                # ... if we are running DFS ...
-                if self.selected_algo == "DFS":
-                    # ... add the successor at the beginning of the list OPEN SET
-                    self.openSet.insert(0, cell)
-                    # Update the color of the cell
-                    self.grid[cell.row][cell.col] = self.FRONTIER
-                    # paint the cell
-                    self.paint_cell(cell.row, cell.col, "BLUE")
-                # ... if we are runnig BFS ...
-                elif self.selected_algo == "BFS":
-                    # ... add the successor at the end of the list OPEN SET
-                    self.openSet.append(cell)
-                    # Update the color of the cell
-                    self.grid[cell.row][cell.col] = self.FRONTIER
-                    # paint the cell
-                    self.paint_cell(cell.row, cell.col, "BLUE")
-                elif self.selected_algo in ["A*", "Greedy"]:       # ... if we are running A* or Greedy algorithms (step 5 of A* algorithm) ...
-                    dxg = current.col - cell.col   # ... calculate the value f(Sj) ...
-                    dyg = current.row - cell.row
-                    dxh = self.targetPos.col - cell.col
-                    dyh = self.targetPos.row - cell.row
-                    if self.diagonal.get():  # with diagonal movements, calculate the Euclidean distance
-                        if self.selected_algo == "Greedy":  # especially for the Greedy ...
-                            cell.g = 0
-                        else:
-                            cell.g = current.g + math.sqrt(dxg * dxg + dyg * dyg)
-                        cell.h = math.sqrt(dxh * dxh + dyh * dyh)
-                    else: # without diagonal movements, calculate the Manhattan distance
-                        if self.selected_algo == "Greedy":  # especially for the Greedy ...
-                            cell.g = 0
-                        else:
-                            cell.g = current.g + abs(dxg) + abs(dyg)
-                        cell.h = abs(dxh) + abs(dyh)
-                    cell.f = cell.g + cell.h                                  # ... If Sj is neither in the OPEN SET nor in the CLOSED SET states ...
-                    if cell not in self.openSet and cell not in self.closedSet:# ... then add Sj in the OPEN SET  ... evaluated as f(Sj)
-                        self.openSet.append(cell)                             # Update the color of the cell
-                        self.grid[cell.row][cell.col] = self.FRONTIER         # paint the cell
-                        self.paint_cell(cell.row, cell.col, "BLUE")
-                    else:                                                     # ... if already belongs to the OPEN SET, then ...
-                        if cell in self.openSet:
-                            open_index = self.openSet.index(cell)             # ... compare the new value assessment with the old one. If old <= new ...
-                            if self.openSet[open_index].f <= cell.f:          # ... then eject the new node with state Sj.(ie do nothing for this node).
-                                pass
-                            else:                                             # ... remove the element (Sj, old) from the list to which it belongs ...
-                                self.openSet.pop(open_index)                  # ... and add the item (Sj, new) to the OPEN SET.
-                                self.openSet.append(cell)                     # Update the color of the cell
-                                self.grid[cell.row][cell.col] = self.FRONTIER # paint the cell
-                                self.paint_cell(cell.row, cell.col, "BLUE")   # ... if already belongs to the CLOSED SET, then ...
-                        elif cell in self.closedSet:
-                            closed_index = self.closedSet.index(cell)         # ... compare the new value assessment with the old one.  If old <= new ...
-                            if self.closedSet[closed_index].f <= cell.f:      # ... then eject the new node with state Sj. (ie do nothing for this node).
-                                pass
-                            else:                                             # ... remove the element (Sj, old) from the list to which it belongs ...
-                                self.closedSet.pop(closed_index)              # ... and add the item (Sj, new) to the OPEN SET.
-                                self.openSet.append(cell)                     # Update the color of the cell
-                                self.grid[cell.row][cell.col] = self.FRONTIER # paint the cell
-                                self.paint_cell(cell.row, cell.col, "BLUE")
-
-    def create_successors(self, current, make_connected):
-        """
-        Creates the successors of a state/cell
-        :param current:        the cell for which we ask successors
-        :param make_connected: flag that indicates that we are interested only on the coordinates
-                               of cells and not on the label 'dist'
-        :return:               the successors of the cell as a list
-        """
-        r = current.row
-        c = current.col
-        # We create an empty list for the successors of the current cell.
-        temp = []
-        # With diagonal movements priority is:
-        # 1: Up 2: Up-right 3: Right 4: Down-right 5: Down 6: Down-left 7: Left 8: Up-left
-        # Without diagonal movements the priority is:  1: Up 2: Right 3: Down 4: Left
-        # If not at the topmost limit of the grid and the up-side cell is not an obstacle and (only in the case are not running the A* or Greedy) not already belongs neither to the OPEN SET nor to the CLOSED SET ...
-        if r > 0 and self.grid[r - 1][c] != self.OBST and \
-                (self.selected_algo in ["Greedy"] or
-                 (self.selected_algo in ["DFS", "BFS"]
-                  and not self.Cell(r - 1, c) in self.openSet and not self.Cell(r - 1, c) in self.closedSet)):
-            cell = self.Cell(r - 1, c)
-            # print("Present at :", r-1,c)
-            if self.selected_algo == "some":
-                if make_connected:
-                    temp.append(cell)
-                elif cell in self.graph:
-                    graph_index = self.graph.index(cell)
-                    temp.append(self.graph[graph_index])
-            else:                   # ... update the pointer of the up-side cell so it points the current one ...
-                cell.prev = current # ... and add the up-side cell to the successors of the current one.
-                temp.append(cell)
-
-        if self.diagonal.get():
-            if r > 0 and c < self.columns - 1 and self.grid[r - 1][c + 1] != self.OBST and \
-                    (self.grid[r - 1][c] != self.OBST or self.grid[r][c + 1] != self.OBST) and \
-                    (self.selected_algo in [ "Greedy", "some"] or
-                     (self.selected_algo in ["DFS", "BFS"]
-                      and not self.Cell(r - 1, c + 1) in self.openSet and not self.Cell(r - 1,
-                                                                                        c + 1) in self.closedSet)):
-                cell = self.Cell(r - 1, c + 1)
-                if self.selected_algo == "some":
-                    if make_connected:
-                        temp.append(cell)
-                    elif cell in self.graph:
-                        graph_index = self.graph.index(cell)
-                        temp.append(self.graph[graph_index])
-                else:                     # ... update the pointer of the up-right-side cell so it points the current one ...
-                    cell.prev = current   # ... and add the up-right-side cell to the successors of the current one.
-                    temp.append(cell)
-
-        if c < self.columns - 1 and self.grid[r][c + 1] != self.OBST and \
-                (self.selected_algo in ["Greedy", "some"] or
-                 (self.selected_algo in ["DFS", "BFS"]
-                  and not self.Cell(r, c + 1) in self.openSet and not self.Cell(r, c + 1) in self.closedSet)):
-            cell = self.Cell(r, c + 1)
-            if self.selected_algo == "some":
-                if make_connected:
-                    temp.append(cell)
-                elif cell in self.graph:
-                    graph_index = self.graph.index(cell)
-                    temp.append(self.graph[graph_index])
-            else:                    # ... update the pointer of the right-side cell so it points the current one ...
-                cell.prev = current  # ... and add the right-side cell to the successors of the current one.
-                temp.append(cell)
-
-        if self.diagonal.get():
-            # If we are not even at the lowermost nor at the rightmost border of the grid and the down-right-side cell is not an obstacle
-            # and one of the down-side or right-side cells are not obstacles and (only in the case are not running the A* or Greedy)
-            # not already belongs neither to the OPEN SET nor to the CLOSED SET ...
-            if r < self.rows - 1 and c < self.columns - 1 and self.grid[r + 1][c + 1] != self.OBST and \
-                    (self.grid[r + 1][c] != self.OBST or self.grid[r][c + 1] != self.OBST) and \
-                    (self.selected_algo in ["A*", "Greedy", "some"] or
-                     (self.selected_algo in ["DFS", "BFS"]
-                      and not self.Cell(r + 1, c + 1) in self.openSet and not self.Cell(r + 1,
-                                                                                        c + 1) in self.closedSet)):
-                cell = self.Cell(r + 1, c + 1)
-                if self.selected_algo == "some":
-                    if make_connected:
-                        temp.append(cell)
-                    elif cell in self.graph:
-                        graph_index = self.graph.index(cell)
-                        temp.append(self.graph[graph_index])
-                else:                   # ... update the pointer of the downr-right-side cell so it points the current one ...
-                    cell.prev = current # ... and add the down-right-side cell to the successors of the current one.
-                    temp.append(cell)
-
-        if r < self.rows - 1 and self.grid[r + 1][c] != self.OBST and \
-                (self.selected_algo in ["Greedy"] or
-                 (self.selected_algo in ["DFS", "BFS"]
-                  and not self.Cell(r + 1, c) in self.openSet and not self.Cell(r + 1, c) in self.closedSet)):
-            cell = self.Cell(r + 1, c)
-            if self.selected_algo == "some":
-                if make_connected:
-                    temp.append(cell)
-                elif cell in self.graph:
-                    graph_index = self.graph.index(cell)
-                    temp.append(self.graph[graph_index])
-            else:                   # ... update the pointer of the down-side cell so it points the current one ...
-                cell.prev = current # ... and add the down-side cell to the successors of the current one.
-                temp.append(cell)
-
-        if self.diagonal.get():
-            # If we are not even at the lowermost nor at the leftmost border of the grid and the down-left-side cell is not an obstacle
-            # and one of the down-side or left-side cells are not obstacles and (only in the case are not running the A* or Greedy)
-            # not already belongs neither to the OPEN SET nor to the CLOSED SET ...
-            if r < self.rows - 1 and c > 0 and self.grid[r + 1][c - 1] != self.OBST and \
-                    (self.grid[r + 1][c] != self.OBST or self.grid[r][c - 1] != self.OBST) and \
-                    (self.selected_algo in [ "Greedy", "some"] or
-                     (self.selected_algo in ["DFS", "BFS"]
-                      and not self.Cell(r + 1, c - 1) in self.openSet and not self.Cell(r + 1,
-                                                                                        c - 1) in self.closedSet)):
-                cell = self.Cell(r + 1, c - 1)
-                if self.selected_algo == "some":
-                    if make_connected:
-                        temp.append(cell)
-                    elif cell in self.graph:
-                        graph_index = self.graph.index(cell)
-                        temp.append(self.graph[graph_index])
-                else:                   # ... update the pointer of the down-left-side cell so it points the current one ...
-                    cell.prev = current # ... and add the down-left-side cell to the successors of the current one.
-                    temp.append(cell)
-        # If not at the leftmost limit of the grid and the left-side cell is not an obstacle
-        # and (only in the case are not running the A* or Greedy) not already belongs neither to the OPEN SET nor to the CLOSED SET ...
-        if c > 0 and self.grid[r][c - 1] != self.OBST and \
-                (self.selected_algo in ["Greedy", "some"] or
-                 (self.selected_algo in ["DFS", "BFS"]
-                  and not self.Cell(r, c - 1) in self.openSet and not self.Cell(r, c - 1) in self.closedSet)):
-            cell = self.Cell(r, c - 1)
-            if self.selected_algo == "some":
-                if make_connected:
-                    temp.append(cell)
-                elif cell in self.graph:
-                    graph_index = self.graph.index(cell)
-                    temp.append(self.graph[graph_index])
-            else:                   # ... update the pointer of the left-side cell so it points the current one ...
-                cell.prev = current # ... and add the left-side cell to the successors of the current one.
-                temp.append(cell)
-
-        if self.diagonal.get():# If we are not even at the topmost nor at the leftmost border of the grid and the up-left-side cell is not an obstacle and one of the up-side or left-side cells are not obstacles and (only in the case are not running the A* or Greedy) not already belongs neither to the OPEN SET nor to the CLOSED SET ...
-            if r > 0 and c > 0 and self.grid[r - 1][c - 1] != self.OBST and \
-                    (self.grid[r - 1][c] != self.OBST or self.grid[r][c - 1] != self.OBST) and \
-                    (self.selected_algo in ["Greedy", "some"] or
-                     (self.selected_algo in []
-                      and not self.Cell(r - 1, c - 1) in self.openSet and not self.Cell(r - 1,
-                                                                                        c - 1) in self.closedSet)):
-                cell = self.Cell(r - 1, c - 1)
-                if self.selected_algo == "some":
-                    if make_connected:
-                        temp.append(cell)
-                    elif cell in self.graph:
-                        graph_index = self.graph.index(cell)
-                        temp.append(self.graph[graph_index])
-                else:                       # ... update the pointer of the up-left-side cell so it points the current one ...
-                    cell.prev = current     # ... and add the up-left-side cell to the successors of the current one.
-                    temp.append(cell)
-        if self.selected_algo == "DFS":
-            return reversed(temp)
-        else:
-            return temp
-
-    def dist_between(self, u, v):
-        """
-        Returns the distance between two cells
-        :param u: the first cell
-        :param v: the other cell
-        :return:  the distance between the cells u and v
-        """
-        dx = u.col - v.col
-        dy = u.row - v.row
-        if self.diagonal.get(): # with diagonal movements calculate the Euclidean distance
-            return math.sqrt(dx * dx + dy * dy)
-        else:                   # without diagonal movements calculate the Manhattan distance
-            return abs(dx) + abs(dy)
+            for r, c, state in changes:
+                self.grid[r][c] = state
+        self.expanded = self.search.expanded
+        self.found = self.search.found
+        if paint and self.statsWindow is not None:
+            self.update_stats()
 
     def plot_route(self):
         """
-        Calculates the path from the target to the initial position of the robot, counts the corresponding steps and measures the distance traveled.
+        Paints the path from the target to the initial position of the robot, counts the corresponding steps and measures the distance traveled.
         """
         self.repaint()
         self.searching = False
-        steps = 0
-        distance = 0.0
-        index = self.closedSet.index(self.targetPos)
-        cur = self.closedSet[index]
-        self.grid[cur.row][cur.col] = self.TARGET
-        self.paint_cell(cur.row, cur.col, "GREEN")
-        while cur != self.robotStart:
-            steps += 1
-            if self.diagonal.get():
-                dx = cur.col - cur.prev.col
-                dy = cur.row - cur.prev.row
-                distance += math.sqrt(dx * dx + dy * dy)
-            else:
-                distance += 1
-            cur = cur.prev
-            self.grid[cur.row][cur.col] = self.ROUTE
-            self.paint_cell(cur.row, cur.col, "YELLOW")
+        route = self.search.path()
+        for r, c in route[1:-1]:
+            self.grid[r][c] = self.ROUTE
+            self.paint_cell(r, c, "YELLOW")
+        self.grid[self.targetPos.row][self.targetPos.col] = self.TARGET
+        self.paint_cell(self.targetPos.row, self.targetPos.col, "GREEN")
         self.grid[self.robotStart.row][self.robotStart.col] = self.ROBOT
         self.paint_cell(self.robotStart.row, self.robotStart.col, "RED")
         if self.drawArrows.get():
             self.draw_arrows()
+        steps = len(route) - 1
+        distance = self.search.path_distance(route)
         msg = "Nodes expanded: {0}, Steps: {1}, Distance: {2:.3f}".format(self.expanded, steps, distance)
         self.message.configure(text=msg)
 
-    def find_connected_component(self, v):
-        """
-        Appends to the list containing the nodes of the graph only
-        the cells belonging to the same connected component with node v.
-        :param v: the starting node
-        """  # This is a Breadth First Search of the graph starting from node v.
-        stack = [v]
-        self.graph.append(v)
-        while stack:
-            v = stack.pop()
-            successors = self.create_successors(v, True)
-            for c in successors:
-                if c not in self.graph:
-                    stack.append(c)
-                    self.graph.append(c)
-
-    def initialize_some(self):
-        self.graph.clear()
-        self.find_connected_component(self.robotStart)
-        for v in self.graph:
-            v.dist = self.INFINITY
-            v.prev = None
-        self.graph[self.graph.index(self.robotStart)].dist = 0
-        self.graph.sort(key=attrgetter("dist"))
-        self.closedSet.clear()
-
     def draw_arrows(self):
         """
-        Draws the arrows to predecessors
+        Draws the arrows to predecessors, of the replayed search while a replay is open, unless the cells are too
+        small to show them
         """
+        if self.square_size < self.ARROW_SQUARE:
+            return  # three lines per cell of a large viewport would freeze the window at every pan or zoom
+        if self.player is not None:
+            parents = self.player
+            route = [divmod(cell, self.columns) for cell in self.player.trace.path.tolist()] if self.routeShown else []
+        elif self.search is not None:
+            parents = self.search
+            route = self.search.path() if self.found else []
+        else:
+            return  # the search shown is gone, e.g. after its replay was closed
         # We draw black arrows from each open or closed state to its predecessor.
-        for r in range(self.rows):
-            for c in range(self.columns):
-                tail = head = cell = self.Cell(r, c)
-                # If the current cell is an open state, or is a closed state but not the initial position of the robot
-                if self.grid[r][c] in [self.FRONTIER, self.CLOSED] and not cell == self.robotStart:
-                    # The tail of the arrow is the current cell, while the arrowhead is the predecessor cell.
-                    if self.grid[r][c] == self.FRONTIER:
-                        if self.selected_algo == "some":
-                            tail = self.graph[self.graph.index(cell)]
-                            head = tail.prev
-                        else:
-                            tail = self.openSet[self.openSet.index(cell)]
-                            head = tail.prev
-                    elif self.grid[r][c] == self.CLOSED:
-                        tail = self.closedSet[self.closedSet.index(cell)]
-                        head = tail.prev
-
-                    self.draw_arrow(tail, head, self.arrow_size, "BLACK", 2 if self.square_size >= 25 else 1)
-
-        if self.found: # We draw red arrows along the path from robotStart to targetPos. index = self.closedSet.index(self.targetPos)
-            cur = self.closedSet[self.closedSet.index(self.targetPos)]
-            while cur != self.robotStart:
-                head = cur
-                cur = cur.prev
-                tail = cur
-                self.draw_arrow(tail, head, self.arrow_size, "RED", 2 if self.square_size >= 25 else 1)
+        view = self.grid[self.top_row:self.top_row + self.view_rows, self.left_col:self.left_col + self.view_cols]
+        for r, c in numpy.argwhere(numpy.isin(view, [self.FRONTIER, self.CLOSED])).tolist():
+            r += self.top_row
+            c += self.left_col
+            # If the current cell is an open state, or is a closed state but not the initial position of the robot
+            if not self.Cell(r, c) == self.robotStart:
+                # The tail of the arrow is the current cell, while the arrowhead is the predecessor cell.
+                prev = parents.parent_of(r, c)
+                if prev is not None:
+                    self.draw_arrow(self.Cell(r, c), self.Cell(*prev), self.arrow_size, "BLACK", 2 if self.square_size >= 25 else 1)
+
+        # We draw red arrows along the path from robotStart to targetPos.
+        for tail, head in zip(route, route[1:]):
+            self.draw_arrow(self.Cell(*tail), self.Cell(*head), self.arrow_size, "RED", 2 if self.square_size >= 25 else 1)
 
     def draw_arrow(self, tail, head, a, color, width):
         """
         Draws an arrow from center of tail cell to center of head cell
         """
         # The coordinates of the center of the tail cell
-        x1 = 1 + tail.col * self.square_size + self.square_size / 2
-        y1 = 1 + tail.row * self.square_size + self.square_size / 2
+        x1 = 1 + (tail.col - self.left_col) * self.square_size + self.square_size / 2
+        y1 = 1 + (tail.row - self.top_row) * self.square_size + self.square_size / 2
         # The coordinates of the center of the head cell
-        x2 = 1 + head.col * self.square_size + self.square_size / 2
-        y2 = 1 + head.row * self.square_size + self.square_size / 2
+        x2 = 1 + (head.col - self.left_col) * self.square_size + self.square_size / 2
+        y2 = 1 + (head.row - self.top_row) * self.square_size + self.square_size / 2
 
         sin20 = math.sin(20 * math.pi / 180)
         cos20 = math.cos(20 * math.pi / 180)
@@ -1051,9 +1260,9 @@ class Maze51:
             u4 = x2 + a * cos25
             v4 = y2 + a * sin25
 
-        self.canvas.create_line(x1, y1, x2, y2, fill=color, width=width)
-        self.canvas.create_line(x2, y2, u3, v3, fill=color, width=width)
-        self.canvas.create_line(x2, y2, u4, v4, fill=color, width=width)
+        self.canvas.create_line(x1, y1, x2, y2, fill=color, width=width, tags="arrows")
+        self.canvas.create_line(x2, y2, u3, v3, fill=color, width=width, tags="arrows")
+        self.canvas.create_line(x2, y2, u4, v4, fill=color, width=width, tags="arrows")
     @staticmethod
     def source_code_callback(self):
         pass
@@ -1074,33 +1283,60 @@ def center(window):
     y = h / 2 - size[1] / 2
     window.geometry("%dx%d+%d+%d" % (size + (x, y)))
 
+SPLASHES = ("all", "text", "figlet", "none")  # the choices of --splash
+STARTUP_BUDGET = 1.0  # the seconds --check-startup allows by default, from the imports to the window ready
+splash_stop = threading.Event()  # set to stop the splash screen
+splash_processes = []  # the process playing the asciimatics splash screen, once started
+splash_lock = threading.Lock()  # keeps the process from being started after stop_splash()
+
+def stop_splash():
+    """Stops the splash screen, terminating the process playing it"""
+    with splash_lock:
+        splash_stop.set()
+        for process in splash_processes:
+            process.terminate()
+
 def on_closing():
     if messagebox.askokcancel("Quit", "Do you want to quit?"):
+        stop_splash()
         os._exit(0)
 
-def demo(screen):
-    effects = [
-        Cycle(
-            screen,
-            FigletText("The Maze Runner", font='big'),
-            int(screen.height / 2 - 8)),
-        Cycle(
-            screen,
-            FigletText("Press 'q' to Start", font='chunky'),
-            int(screen.height * (3 / 4) - 8)),
-        Stars(screen, 200)
-    ]
-    screen.play([Scene(effects, 500)])
-
-def load_animation():
+def play_splash(splash):
+    """
+    Plays the splash screen in the terminal on a thread, while the window is
+    built and used. The asciimatics screen takes over the terminal, so it
+    runs in a child process, the "splash" command of this script or of the
+    frozen executable, and this process never imports asciimatics.
+    """
+    if splash in ("all", "text"):
+        load_animation(splash_stop)
+    if splash in ("all", "figlet"):
+        command = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, os.path.abspath(__file__)]
+        with splash_lock:
+            if not splash_stop.is_set():
+                splash_processes.append(subprocess.Popen(command + ["splash"]))
+
+def report_startup(imported, built, budget):
+    """Prints the startup times once the window is ready, then quits if they are checked against a budget"""
+    ready = time.perf_counter()
+    sys.stderr.write("Startup: imports %.3f s, window %.3f s, ready %.3f s\n" %
+                     (imported - STARTED, built - imported, ready - STARTED))
+    if budget is not None:
+        if ready - STARTED > budget:
+            sys.stderr.write("Startup took longer than the budget of %.3f s\n" % budget)
+        sys.stderr.flush()
+        os._exit(1 if ready - STARTED > budget else 0)
+
+def load_animation(stop=None):
     load_str = "starting The Maze Runner..."  # String to be displayed when the application is loading
     ls_len = len(load_str)
     animation = "|/-\\"                  # String for creating the rotating line
     anicount = 0
     counttime = 0                        # used to keep the track of the duration of animation
     i = 0                                # pointer for travelling the loading string
-    while (counttime != 100):
-        time.sleep(0.05)                 # used to change the animation speed .. smaller the value, faster will be the animation
+    stop = stop or threading.Event()     # set to end the animation early
+    while (counttime != 100 and not stop.is_set()):
+        stop.wait(0.05)                  # used to change the animation speed .. smaller the value, faster will be the animation
         load_str_list = list(load_str)   # converting the string to list as string is immutable
         x = ord(load_str_list[i])        # x->obtaining the ASCII code
         y = 0                            # y->for storing altered ASCII code
@@ -1119,28 +1355,41 @@ def load_animation():
         anicount = (anicount + 1) % 4
         i = (i + 1) % ls_len
         counttime = counttime + 1
-
-    # for windows OS
-    if os.name == "nt":
-        os.system("cls")
-    # for linux / Mac OS
-    else:
-        os.system("clear")
+    sys.stdout.write("\r" + " " * (ls_len + 1) + "\r")  # erases the line only, keeping what was printed before
+    sys.stdout.flush()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="AIassg.py", description="The Maze Runner. The commands 'solve', 'bench', "
+                                                                   "'serve' and 'check' run the batch solver, the "
+                                                                   "benchmarks, the solve service and the checks of "
+                                                                   "the searches.")
+    parser.add_argument("--splash", choices=SPLASHES, default="all",
+                        help="the splash screen played in the terminal while the window opens (default: all)")
+    parser.add_argument("--startup-time", action="store_true", help="print the startup times once the window is ready")
+    parser.add_argument("--check-startup", type=float, nargs="?", const=STARTUP_BUDGET, metavar="SECONDS",
+                        help="quit once the window is ready, with status 1 if that took longer than SECONDS "
+                             "(default: %.1f); implies --splash none" % STARTUP_BUDGET)
+    args = parser.parse_args()
+    imported = time.perf_counter()
+
     app = Tk()
     app.protocol("WM_DELETE_WINDOW", on_closing)
     app.title("The Maze Runner")
     app.geometry("693x545")
     app.resizable(False, False)
 
-    # Animation Effects
-    load_animation()  # uncomment this line for animation 1
-    Screen.wrapper(demo)  # uncomment this line for animation 2
+    # Animation Effects, which no longer hold the window back
+    if args.splash != "none" and args.check_startup is None:
+        threading.Thread(target=play_splash, args=(args.splash,), name="Splash", daemon=True).start()
 
     # Let the party begin
     Maze51(app)
-    app.mainloop()
+    if args.startup_time or args.check_startup is not None:
+        app.after_idle(report_startup, imported, time.perf_counter(), args.check_startup)
+    try:
+        app.mainloop()
+    finally:
+        stop_splash()
 
 
 """
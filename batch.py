@@ -0,0 +1,179 @@
+"""
+Batch solving of start/target queries on grid files, without user interface.
+
+The walls of every grid file are copied once, still packed at one bit per
+cell, into a block of multiprocessing.shared_memory. The tasks sent to the
+worker processes only name the block, so the grid is never pickled; every
+worker maps the block and builds the neighbor tables of a grid once, then
+reuses them for all the queries on it, keeping the tables of the
+WORKER_GRIDS grids used last. One JSON line is written per query,
+in the order of the queries, with the numbers that Maze51 shows at the end
+of a search and the wall-clock time of the search.
+
+    python AIassg.py solve mazes/*.maze --queries queries.txt --algorithm A* --diagonal
+
+The query file has one query per line, "start_row start_col target_row
+target_col", and # comments; without one, every grid is solved once from
+the robot to the target saved in its file. With --metrics, the searches
+are instrumented and their statistics are also written to a metrics file.
+With --traces, every search is recorded and its trace saved in a directory,
+named after the number of its query, to be replayed in Maze51.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy
+
+import gridfile
+import metrics
+import replay
+import solver
+
+WORKER_GRIDS = 8  # the most grids whose neighbor tables a worker process keeps
+WORKER_CELLS = 1 << 26  # the most cells of these grids, the grid in use excepted
+
+_grids = OrderedDict()  # the tables built by a worker process: shared memory name -> Adjacency, the latest used last
+
+
+def read_queries(path):
+    """
+    Reads a query file.
+    :return: the list of (start, target) queries
+    :raises ValueError: if a line is not a query
+    """
+    queries = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                sr, sc, tr, tc = (int(value) for value in line.split())
+            except ValueError:
+                raise ValueError("%s:%d: expected 'start_row start_col target_row target_col'" % (path, number))
+            queries.append(((sr, sc), (tr, tc)))
+    return queries
+
+
+def share(grid_file):
+    """ Copies the packed walls of a grid file into a new block of shared memory """
+    block = shared_memory.SharedMemory(create=True, size=max(grid_file.bits.nbytes, 1))
+    numpy.ndarray(grid_file.bits.shape, dtype=numpy.uint8, buffer=block.buf)[...] = grid_file.bits
+    return block
+
+
+def _adjacency(name, rows, columns):
+    """
+    Returns the neighbor tables of a shared grid, building them on first use.
+    The block is detached as soon as they are built, and the tables of the
+    grids used least recently are dropped beyond WORKER_GRIDS grids or
+    WORKER_CELLS cells.
+    """
+    if name in _grids:
+        _grids.move_to_end(name)
+        return _grids[name]
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # no reference to the array is kept, the block cannot be closed while one uses its buffer
+        adjacency = solver.Adjacency.from_bits(
+            numpy.ndarray((rows, (columns + 7) // 8), dtype=numpy.uint8, buffer=block.buf), columns)
+    finally:
+        block.close()
+    cells = rows * columns
+    while _grids and (len(_grids) >= WORKER_GRIDS or
+                      cells + sum(grid.rows * grid.columns for grid in _grids.values()) > WORKER_CELLS):
+        _grids.popitem(last=False)
+    _grids[name] = adjacency
+    return adjacency
+
+
+def solve_task(task):
+    """ Solves a query in a worker process; the task names the grid instead of holding it """
+    name, rows, columns, path, start, target, algorithm, diagonal, instrument, trace, route = task
+    record = {"maze": path, "start": list(start), "target": list(target),
+              "algorithm": algorithm, "diagonal": diagonal}
+    for cell in (start, target):
+        if not (0 <= cell[0] < rows and 0 <= cell[1] < columns):
+            record["error"] = "(%d, %d) outside the %d x %d grid" % (cell[0], cell[1], rows, columns)
+            return record
+    adjacency = _adjacency(name, rows, columns)
+    began = time.perf_counter()
+    search = solver.new_search(None, start, target, algorithm, diagonal, adjacency)
+    stats = metrics.SearchStats() if instrument else None
+    if stats is not None:
+        stats.attach(search)
+    recorder = replay.Recorder(adjacency.walls) if trace else None
+    if recorder is not None:
+        recorder.attach(search)
+    result = search.run()
+    record.update(found=result.found, steps=result.steps, distance=round(result.distance, 3),
+                  expanded=result.expanded, seconds=time.perf_counter() - began)
+    if route:
+        record["path"] = [list(cell) for cell in result.path]
+    if stats is not None:
+        record["stats"] = stats.as_dict()
+    if recorder is not None:
+        recorder.trace().save(trace)
+        record["trace"] = trace
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="AIassg.py solve", description="Solves queries on grid files in parallel.")
+    parser.add_argument("mazes", nargs="+", help="the grid files, as saved by Maze51")
+    parser.add_argument("-q", "--queries", help="file of 'start_row start_col target_row target_col' lines; "
+                                                "by default the robot and target of each grid")
+    parser.add_argument("-a", "--algorithm", action="append", choices=solver.ALGORITHMS,
+                        help="the algorithm, may be repeated (default: A*)")
+    parser.add_argument("-d", "--diagonal", action="store_true", help="allow diagonal movements")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="the number of worker processes")
+    parser.add_argument("-o", "--output", help="the JSON lines file (default: standard output)")
+    parser.add_argument("-m", "--metrics", help="instrument the searches and write their statistics to this file, "
+                                                "in the Prometheus text format if it ends with .prom, else as JSON")
+    parser.add_argument("-t", "--traces", help="record the searches and save their traces in this directory")
+    args = parser.parse_args(argv)
+    algorithms = args.algorithm or ["A*"]
+    try:
+        queries = read_queries(args.queries) if args.queries else None
+        grids = [gridfile.load(path) for path in args.mazes]
+        if args.traces:
+            os.makedirs(args.traces, exist_ok=True)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    blocks = []
+    try:
+        tasks = []
+        for grid_file in grids:
+            block = share(grid_file)
+            blocks.append(block)
+            for start, target in queries or [(grid_file.robot, grid_file.target)]:
+                for algorithm in algorithms:
+                    trace = os.path.join(args.traces, "%d%s" % (len(tasks), replay.EXTENSION)) if args.traces else None
+                    tasks.append((block.name, grid_file.rows, grid_file.columns, grid_file.path,
+                                  start, target, algorithm, args.diagonal, bool(args.metrics), trace, False))
+        output = open(args.output, "w") if args.output else sys.stdout
+        measured = []  # the (labels, statistics) of the instrumented searches
+        try:
+            with multiprocessing.Pool(max(args.workers, 1)) as pool:
+                for number, record in enumerate(pool.imap(solve_task, tasks,
+                                                          chunksize=max(len(tasks) // (8 * max(args.workers, 1)), 1))):
+                    if "stats" in record:
+                        measured.append(({"maze": record["maze"], "query": str(number)}, record["stats"]))
+                    output.write(json.dumps(record) + "\n")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if args.metrics:
+            metrics.write(args.metrics, measured)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return 0
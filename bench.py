@@ -0,0 +1,249 @@
+"""
+Benchmarks of maze generation, neighbor tables, search and rendering.
+
+Every scenario is built from a fixed seed, so two runs measure the same
+grids and the same searches:
+
+    open        a grid without obstacles
+    random-D    obstacles on D percent of the cells
+    maze        a perfect maze of the growing tree generator
+    dead-ends   a comb of corridors that lead towards the target and end in
+                walls, which the heuristic searches enter one by one
+
+Each scenario and size is solved from the bottom-left to the top-right
+corner by every algorithm, with and without diagonal movements. The phases
+are timed separately: building the grid, building the neighbor tables,
+the first search on them, which builds the caches of HPA*, a second search
+and, when a display is available, rendering the grid. The peak memory of
+the search is measured by tracemalloc in a last, untimed run. compare()
+reports a slowdown when the median time grows by more than REGRESSION and
+by more than the spread of the repeats, with NOISE seconds at least.
+
+    python AIassg.py bench --sizes 41,1001,4001 --output new.json --compare old.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+import mazes
+import solver
+
+SCENARIOS = ("open", "random-10", "random-25", "random-40", "maze", "dead-ends")
+SIZES = (41, 201, 1001)
+SEED = 51
+VIEW_SIZE = 500  # the viewport of Maze51, in pixels
+REGRESSION = 1.10  # the slowdown reported as a regression by compare()
+NOISE = 0.005  # the slowdown in seconds below which compare() never reports a regression
+
+
+def build(scenario, size, seed=SEED):
+    """
+    Builds the grid of a scenario.
+    :return: (grid, start, target)
+    """
+    grid = numpy.zeros((size, size), dtype=numpy.int8)
+    start, target = (size - 1, 0), (0, size - 1)
+    if scenario.startswith("random-"):
+        density = int(scenario[len("random-"):]) / 100
+        grid[numpy.random.default_rng(seed).random((size, size)) < density] = solver.OBST
+    elif scenario == "maze":
+        size -= 1 - size % 2  # a maze needs an odd size
+        grid = mazes.stamp(mazes.growing_tree(size // 2, size // 2, seed), solver.OBST)
+        start, target = (size - 2, 1), (1, size - 2)
+    elif scenario == "dead-ends":
+        # a wall below the top row, open at the left, and corridors hanging from it, open at the bottom
+        grid[1, 1:] = solver.OBST
+        grid[2:-1, 2::2] = solver.OBST
+    elif scenario != "open":
+        raise ValueError("unknown scenario: %r" % (scenario,))
+    if scenario.startswith("random-"):
+        # keep the corners from being walled in
+        grid[-2:, :2] = grid[:2, -2:] = solver.EMPTY
+    grid[start] = grid[target] = solver.EMPTY
+    return grid, start, target
+
+
+def render_time(grid):
+    """ Returns the time to draw the grid in a viewport of Maze51, None without a display """
+    try:
+        import tkinter
+        import render
+    except ImportError:
+        return None
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:  # no display
+        return None
+    try:
+        rows, columns = grid.shape
+        square_size = max(VIEW_SIZE // max(rows, columns), 1)
+        view = (0, 0, min(rows, VIEW_SIZE // square_size), min(columns, VIEW_SIZE // square_size), square_size)
+        canvas = tkinter.Canvas(root, width=VIEW_SIZE + 1, height=VIEW_SIZE + 1)
+        canvas.pack()
+        colors = {state: "WHITE" for state in range(solver.ROUTE + 1)}
+        colors[solver.OBST] = "BLACK"
+        began = time.perf_counter()
+        renderer = (render.ImageRenderer if view[2] * view[3] > 2500 else render.ItemRenderer)(canvas, colors)
+        renderer.reset(view)
+        renderer.repaint(grid)
+        root.update()
+        return time.perf_counter() - began
+    finally:
+        root.destroy()
+
+
+def run_case(grid, start, target, algorithm, diagonal, memory=True, repeat=3):
+    """
+    Benchmarks a search, returning its record. Every repeat builds fresh
+    neighbor tables and times the first search on them, which also pays for
+    the caches built on first use, e.g. the clusters of HPA*, then a second
+    search that reuses them. The record holds the median and the range of
+    each time.
+    """
+    times = {"tables": [], "first_search": [], "search": []}
+    for _ in range(max(repeat, 1)):
+        began = time.perf_counter()
+        adjacency = solver.Adjacency(grid)
+        adjacency.table(diagonal)
+        times["tables"].append(time.perf_counter() - began)
+        began = time.perf_counter()
+        solver.solve(None, start, target, algorithm, diagonal, adjacency)
+        times["first_search"].append(time.perf_counter() - began)
+        began = time.perf_counter()
+        result = solver.solve(None, start, target, algorithm, diagonal, adjacency)
+        times["search"].append(time.perf_counter() - began)
+    record = {"algorithm": algorithm, "diagonal": diagonal, "found": result.found, "steps": result.steps,
+              "distance": round(result.distance, 3), "expanded": result.expanded}
+    for name, seconds in times.items():
+        record[name + "_seconds"] = float(numpy.median(seconds))
+        record[name + "_range"] = [min(seconds), max(seconds)]
+    seconds = record["search_seconds"]
+    record["nodes_per_second"] = result.expanded / seconds if seconds else None
+    if memory:
+        tracemalloc.start()
+        solver.solve(None, start, target, algorithm, diagonal, adjacency)
+        record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return record
+
+
+def run(scenarios=SCENARIOS, sizes=SIZES, algorithms=solver.ALGORITHMS, memory=True, rendering=True, repeat=3, log=None):
+    """
+    Runs the benchmarks.
+    :param log: file where the progress is written, one line per case
+    :return: the results, as saved by main()
+    """
+    results = []
+    for scenario in scenarios:
+        for size in sizes:
+            began = time.perf_counter()
+            grid, start, target = build(scenario, size)
+            generate = time.perf_counter() - began
+            draw = render_time(grid) if rendering else None
+            for algorithm in algorithms:
+                for diagonal in (False, True):
+                    record = {"case": case_key(scenario, size, algorithm, diagonal), "scenario": scenario, "size": size,
+                              "generate_seconds": generate, "render_seconds": draw}
+                    record.update(run_case(grid, start, target, algorithm, diagonal, memory, repeat))
+                    results.append(record)
+                    if log is not None:
+                        log.write("%-32s %9d nodes %8.3f s %12.0f nodes/s\n" % (
+                            record["case"], record["expanded"], record["search_seconds"], record["nodes_per_second"] or 0))
+                        log.flush()
+    return {"meta": {"python": platform.python_version(), "numpy": numpy.__version__,
+                     "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": SEED,
+                     "repeat": repeat},
+            "results": results}
+
+
+def case_key(scenario, size, algorithm, diagonal):
+    return "%s/%d/%s/%s" % (scenario, size, algorithm, "8" if diagonal else "4")
+
+
+def slower(old, new, name):
+    """
+    Tells if a time of a case is a regression: its median is more than
+    REGRESSION times the median before, and the difference exceeds both
+    NOISE and the widest spread of the repeats of either run.
+    """
+    if name + "_seconds" not in old:
+        return False
+    before, after = old[name + "_seconds"], new[name + "_seconds"]
+    spread = max(high - low for low, high in (old.get(name + "_range", [before] * 2),
+                                              new.get(name + "_range", [after] * 2)))
+    return after > before * REGRESSION and after - before > max(NOISE, spread)
+
+
+def compare(previous, current, out=sys.stdout):
+    """
+    Prints the search time of the cases of both runs side by side. A case is
+    slower when the median of the first search or the second is slower()
+    than before.
+    :return: the number of slower cases
+    """
+    before = {record["case"]: record for record in previous["results"]}
+    regressions = 0
+    for record in current["results"]:
+        old = before.get(record["case"])
+        if old is None:
+            continue
+        ratio = record["search_seconds"] / old["search_seconds"] if old["search_seconds"] else float("inf")
+        flag = ""
+        if slower(old, record, "search"):
+            flag = "  SLOWER"
+            regressions += 1
+        elif slower(old, record, "first_search"):
+            flag = "  SLOWER first search %.3f s -> %.3f s" % (old["first_search_seconds"], record["first_search_seconds"])
+            regressions += 1
+        elif old["expanded"] != record["expanded"]:
+            flag = "  expanded %d -> %d" % (old["expanded"], record["expanded"])
+        out.write("%-32s %8.3f s -> %8.3f s  x%.2f%s\n" % (record["case"], old["search_seconds"],
+                                                            record["search_seconds"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="AIassg.py bench", description="Benchmarks generation, search and rendering.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                        help="comma separated grid sizes (default: %(default)s)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated scenarios (default: all)")
+    parser.add_argument("--algorithms", default=",".join(solver.ALGORITHMS), help="comma separated algorithms (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="the times each case is run on fresh tables, keeping the median (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--no-render", action="store_true", help="skip the rendering measurement")
+    parser.add_argument("-o", "--output", help="the JSON file of the results")
+    parser.add_argument("-c", "--compare", help="a previous JSON file of results to compare with")
+    args = parser.parse_args(argv)
+    try:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    except ValueError:
+        parser.error("--sizes: expected comma separated integers")
+    scenarios = args.scenarios.split(",")
+    algorithms = args.algorithms.split(",")
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            parser.error("unknown scenario %r, expected one of %s" % (scenario, ", ".join(SCENARIOS)))
+    for algorithm in algorithms:
+        if algorithm not in solver.ALGORITHMS:
+            parser.error("unknown algorithm %r, expected one of %s" % (algorithm, ", ".join(solver.ALGORITHMS)))
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    results = run(scenarios, sizes, algorithms, not args.no_memory, not args.no_render, args.repeat, sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if previous is not None:
+        return 1 if compare(previous, results) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
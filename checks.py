@@ -0,0 +1,232 @@
+"""
+Randomized checks of the searches that trade the plain expansion of A* for
+speed, and of the incremental planner, against the searches they must
+agree with.
+
+Every trial builds a random grid, with random obstacles, robot and target,
+from its own seed, so a failure is reproduced by its trial number:
+
+    jps     Jump Point Search finds a path exactly when Dijkstra does, its
+            path is made of valid moves from the robot to the target, and
+            its length is the distance of Dijkstra and of A*
+    hpa     HPA* finds a path exactly when Dijkstra does, its path is made
+            of valid moves, at most HPA_RATIO times the shortest distance
+            plus HPA_SLACK long, and after random walls are painted, the
+            clusters kept by the Adjacency give the result of a fresh one
+    bidir   with and without diagonal moves, Bi-BFS, Bi-Dijkstra and Bi-A*
+            find a path exactly when Dijkstra does, made of valid moves,
+            as few as those of BFS for Bi-BFS, and as long as the path of
+            Dijkstra for the other two
+    dstar   the D* Lite Replanner, after every one of DSTAR_EDITS random
+            walls painted or erased and moves of the robot or the target,
+            some of its repairs cancelled and resumed, finds a path exactly
+            when a fresh Dijkstra does, made of valid moves and of the same
+            length
+
+    python AIassg.py check --trials 2000 --seed 51
+"""
+import argparse
+import math
+import random
+import sys
+
+import numpy
+
+import solver
+
+SEED = 51
+TRIALS = 1000
+MAX_SIZE = 60  # the largest rows and columns of the random grids
+DENSITIES = (0.05, 0.3, 0.4, 0.45)  # the fractions of obstacles, the last ones around the percolation threshold
+HPA_RATIO = 1.5  # the paths of HPA* cross the clusters at fixed entrance cells, so they may be longer than the
+HPA_SLACK = solver.CLUSTER_SIZE  # shortest ones: up to this ratio, plus this detour around the robot and the target
+HPA_EDITS = 5  # the walls painted or erased before the cached clusters are compared with fresh ones
+DSTAR_EDITS = 20  # the edits of the grid, the robot or the target repaired by the D* Lite Replanner
+
+
+def random_case(seed):
+    """
+    Builds the grid of a trial.
+    :return: (grid, start, target, diagonal)
+    """
+    rng = random.Random(seed)
+    rows, columns = rng.randint(1, MAX_SIZE), rng.randint(1, MAX_SIZE)
+    grid = numpy.zeros((rows, columns), dtype=numpy.int8)
+    grid[numpy.random.default_rng(seed).random((rows, columns)) < rng.choice(DENSITIES)] = solver.OBST
+    start = (rng.randrange(rows), rng.randrange(columns))
+    target = (rng.randrange(rows), rng.randrange(columns))
+    grid[start] = grid[target] = solver.EMPTY
+    return grid, start, target, rng.random() < 0.5
+
+
+def path_error(adjacency, diagonal, start, target, result):
+    """
+    Checks the path of a search that found the target.
+    :return: the description of what is wrong, None if the path is valid and its length the distance reported
+    """
+    path, columns = result.path, adjacency.columns
+    if not path or path[0] != start or path[-1] != target:
+        return "the path does not lead from %s to %s" % (start, target)
+    neighbors = adjacency.neighbor_function(diagonal)
+    length = 0
+    for (r1, c1), (r2, c2) in zip(path, path[1:]):
+        if r2 * columns + c2 not in neighbors(r1 * columns + c1):
+            return "invalid move from %s to %s" % ((r1, c1), (r2, c2))
+        length += math.sqrt(2) if r1 != r2 and c1 != c2 else 1
+    if abs(length - result.distance) > solver.EPSILON * len(path):
+        return "the path is %r long, the distance reported %r" % (length, result.distance)
+    return None
+
+
+def check_jps(grid, start, target, diagonal):
+    """ Returns what is wrong with JPS on a grid, None if nothing """
+    adjacency = solver.Adjacency(grid)
+    dijkstra = solver.solve(None, start, target, "some", diagonal, adjacency)
+    jps = solver.solve(None, start, target, "JPS", diagonal, adjacency)
+    if jps.found != dijkstra.found:
+        return "JPS found: %s, Dijkstra found: %s" % (jps.found, dijkstra.found)
+    if not jps.found:
+        return None
+    error = path_error(adjacency, diagonal, start, target, jps)
+    if error is not None:
+        return error
+    astar = solver.solve(None, start, target, "A*", diagonal, adjacency)
+    if abs(jps.distance - dijkstra.distance) > solver.EPSILON or abs(jps.distance - astar.distance) > solver.EPSILON:
+        return "JPS distance %r, Dijkstra %r, A* %r" % (jps.distance, dijkstra.distance, astar.distance)
+    return None
+
+
+def check_hpa(grid, start, target, diagonal):
+    """ Returns what is wrong with HPA* on a grid, None if nothing """
+    adjacency = solver.Adjacency(grid)
+    dijkstra = solver.solve(None, start, target, "some", diagonal, adjacency)
+    hpa = solver.solve(None, start, target, "HPA*", diagonal, adjacency)
+    if hpa.found != dijkstra.found:
+        return "HPA* found: %s, Dijkstra found: %s" % (hpa.found, dijkstra.found)
+    if hpa.found:
+        error = path_error(adjacency, diagonal, start, target, hpa)
+        if error is not None:
+            return error
+        if hpa.distance > HPA_RATIO * dijkstra.distance + HPA_SLACK:
+            return "HPA* distance %r, shortest %r" % (hpa.distance, dijkstra.distance)
+    grid = grid.copy()
+    rng = random.Random(grid.size)
+    for _ in range(HPA_EDITS):
+        r, c = rng.randrange(grid.shape[0]), rng.randrange(grid.shape[1])
+        if (r, c) not in (start, target):
+            wall = grid[r, c] != solver.OBST
+            grid[r, c] = solver.OBST if wall else solver.EMPTY
+            adjacency.set_wall(r, c, wall)
+    cached = solver.solve(None, start, target, "HPA*", diagonal, adjacency)
+    fresh = solver.solve(grid, start, target, "HPA*", diagonal)
+    if (cached.found, cached.path, cached.expanded) != (fresh.found, fresh.path, fresh.expanded):
+        return "after edits, the cached clusters give %s (%d expanded), fresh ones %s (%d expanded)" % (
+            cached.distance if cached.found else "no path", cached.expanded,
+            fresh.distance if fresh.found else "no path", fresh.expanded)
+    return None
+
+
+def check_bidir(grid, start, target, diagonal):
+    """ Returns what is wrong with the bidirectional searches on a grid, in both connectivities, None if nothing """
+    adjacency = solver.Adjacency(grid)
+    for diagonal in (False, True):
+        dijkstra = solver.solve(None, start, target, "some", diagonal, adjacency)
+        bfs = solver.solve(None, start, target, "BFS", diagonal, adjacency)
+        for algorithm in solver.BIDIRECTIONAL:
+            result = solver.solve(None, start, target, algorithm, diagonal, adjacency)
+            if result.found != dijkstra.found:
+                error = "found: %s, Dijkstra found: %s" % (result.found, dijkstra.found)
+            elif not result.found:
+                continue
+            else:
+                error = path_error(adjacency, diagonal, start, target, result)
+            if error is None and algorithm == "Bi-BFS" and result.steps != bfs.steps:
+                error = "%d steps, BFS %d" % (result.steps, bfs.steps)
+            if error is None and algorithm != "Bi-BFS" and abs(result.distance - dijkstra.distance) > solver.EPSILON:
+                error = "distance %r, Dijkstra %r" % (result.distance, dijkstra.distance)
+            if error is not None:
+                return "%s, diagonal %s: %s" % (algorithm, diagonal, error)
+    return None
+
+
+def check_dstar(grid, start, target, diagonal):
+    """ Returns what is wrong with the D* Lite Replanner on a grid, None if nothing """
+    grid = grid.copy()
+    rows, columns = grid.shape
+    replanner = solver.Replanner(grid, start, target, diagonal)
+    rng = random.Random(grid.size)
+    for edit in range(DSTAR_EDITS + 1):
+        if edit:
+            r, c = rng.randrange(rows), rng.randrange(columns)
+            action = rng.random()
+            if action < 0.15 and grid[r, c] != solver.OBST and (r, c) != target:
+                start = (r, c)
+                replanner.move_start(r, c)
+            elif action < 0.3 and grid[r, c] != solver.OBST and (r, c) != start:
+                target = (r, c)
+                replanner.move_target(r, c)
+            elif (r, c) not in (start, target):
+                wall = grid[r, c] != solver.OBST
+                grid[r, c] = solver.OBST if wall else solver.EMPTY
+                replanner.set_wall(r, c, wall)
+        if rng.random() < 0.3:
+            # the repair is cancelled after a few polls, then resumed by the next call, as in Real-Time mode
+            polls = iter(range(rng.randrange(20), -1, -1))
+            result = replanner.compute(lambda: next(polls, 0) == 0)
+            if result is None:
+                result = replanner.compute()
+        else:
+            result = replanner.compute()
+        dijkstra = solver.solve(grid, start, target, "some", diagonal)
+        if result.found != dijkstra.found:
+            return "after %d edits, D* Lite found: %s, Dijkstra found: %s" % (edit, result.found, dijkstra.found)
+        if not result.found:
+            continue
+        error = path_error(replanner.adjacency, diagonal, start, target, result)
+        if error is None and abs(result.distance - dijkstra.distance) > solver.EPSILON * len(result.path):
+            error = "D* Lite distance %r, Dijkstra %r" % (result.distance, dijkstra.distance)
+        if error is not None:
+            return "after %d edits, %s" % (edit, error)
+    return None
+
+
+CHECKS = {"jps": check_jps, "hpa": check_hpa, "bidir": check_bidir, "dstar": check_dstar}
+
+
+def run(checks=tuple(CHECKS), trials=TRIALS, seed=SEED, out=sys.stdout):
+    """
+    Runs the checks on the same random grids.
+    :param out: file where the failures and the summary are written
+    :return: the number of failures
+    """
+    failures = dict.fromkeys(checks, 0)
+    for trial in range(seed, seed + trials):
+        grid, start, target, diagonal = random_case(trial)
+        for name in checks:
+            error = CHECKS[name](grid, start, target, diagonal)
+            if error is not None:
+                failures[name] += 1
+                out.write("%s: trial %d, %dx%d grid, %s to %s, diagonal %s: %s\n" % (
+                    name, trial, grid.shape[0], grid.shape[1], start, target, diagonal, error))
+    for name in checks:
+        out.write("%-5s %d trials, %d failed\n" % (name, trials, failures[name]))
+    return sum(failures.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="AIassg.py check", description="Checks the fast and incremental "
+                                                                         "searches against the exact ones on random "
+                                                                         "grids.")
+    parser.add_argument("--checks", default=",".join(CHECKS), help="comma separated checks (default: all)")
+    parser.add_argument("--trials", type=int, default=TRIALS, help="the number of random grids (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=SEED, help="the seed of the first trial (default: %(default)s)")
+    args = parser.parse_args(argv)
+    checks = args.checks.split(",")
+    for name in checks:
+        if name not in CHECKS:
+            parser.error("unknown check %r, expected one of %s" % (name, ", ".join(CHECKS)))
+    return 1 if run(checks, args.trials, args.seed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
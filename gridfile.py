@@ -0,0 +1,105 @@
+"""
+Binary files of grids, with the obstacles packed at one bit per cell.
+
+A file is a HEADER_SIZE byte header followed by the walls, row after row,
+each row packed by numpy.packbits into (columns + 7) // 8 bytes. The header
+holds the dimensions, the positions of the robot and the target and the seed
+of the maze, if the grid was generated. The walls are memory-mapped when a
+file is loaded, so even huge grids open at once and are read only as far as
+they are used. Loading is lazy, solving is not: GridFile.adjacency() unpacks
+the mapped bits, a chunk of rows at a time, into the neighbor tables of the
+solver, which hold a byte of walls and a byte of moves per cell, and the
+searches keep their own arrays of a few bytes per cell. Only the grid of
+cell states is never built for a search.
+"""
+import struct
+
+import numpy
+
+import solver
+
+MAGIC = b"MAZE51"
+VERSION = 1
+EXTENSION = ".maze"
+HEADER = struct.Struct("<6sHIIIIIIBq")  # magic, version, rows, columns, robot, target, has seed, seed
+HEADER_SIZE = 64  # the header is padded so the walls start aligned
+CHUNK_ROWS = 4096  # the rows packed or unpacked at a time, which bounds the memory used
+
+
+class GridFile(object):
+    """ A loaded grid file, whose walls are memory-mapped """
+    def __init__(self, path, rows, columns, robot, target, seed, bits):
+        self.path = path
+        self.rows = rows
+        self.columns = columns
+        self.robot = robot  # the (row, col) of the robot
+        self.target = target  # the (row, col) of the target
+        self.seed = seed  # the seed of the maze, None if unknown
+        self.bits = bits  # the packed walls, rows x ((columns + 7) // 8) bytes
+
+    def walls(self, r0=0, r1=None):
+        """ Returns the walls of rows r0..r1-1 as a boolean array """
+        return numpy.unpackbits(self.bits[r0:r1], axis=1, count=self.columns).view(bool)
+
+    def states(self, obst=solver.OBST, empty=solver.EMPTY):
+        """ Returns the grid as an array of cell states, without the robot and the target """
+        grid = numpy.full((self.rows, self.columns), empty, dtype=numpy.int8)
+        for r0 in range(0, self.rows, CHUNK_ROWS):
+            grid[r0:r0 + CHUNK_ROWS][self.walls(r0, r0 + CHUNK_ROWS)] = obst
+        return grid
+
+    def adjacency(self):
+        """ Returns the neighbor tables of the grid, unpacked from the mapped walls, O(cells) in memory """
+        return solver.Adjacency.from_bits(self.bits, self.columns)
+
+
+def save(path, grid, robot, target, seed=None, obst=solver.OBST):
+    """
+    Writes a grid file.
+    :param grid:   2d array of cell states; only obst cells are saved, as walls
+    :param robot:  the (row, col) of the robot
+    :param target: the (row, col) of the target
+    :param seed:   the seed of the maze, if the grid was generated
+    """
+    rows, columns = numpy.shape(grid)
+    _check(rows, columns, robot, target)
+    try:
+        header = HEADER.pack(MAGIC, VERSION, rows, columns, robot[0], robot[1], target[0], target[1],
+                             seed is not None, 0 if seed is None else seed)
+    except struct.error:
+        raise ValueError("the seed %d does not fit in 64 bits" % seed)
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for r0 in range(0, rows, CHUNK_ROWS):
+            f.write(numpy.packbits(numpy.asarray(grid[r0:r0 + CHUNK_ROWS]) == obst, axis=1).tobytes())
+
+
+def load(path):
+    """
+    Opens a grid file, mapping its walls into memory.
+    :return: the GridFile
+    :raises ValueError: if the file is not a valid grid file
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a grid file: %s" % path)
+    magic, version, rows, columns, robot_row, robot_col, target_row, target_col, has_seed, seed = \
+        HEADER.unpack_from(header)
+    if version != VERSION:
+        raise ValueError("unsupported grid file version %d: %s" % (version, path))
+    _check(rows, columns, (robot_row, robot_col), (target_row, target_col))
+    try:
+        bits = numpy.memmap(path, dtype=numpy.uint8, mode="r", offset=HEADER_SIZE, shape=(rows, (columns + 7) // 8))
+    except ValueError:  # the file is shorter than its walls
+        raise ValueError("truncated grid file: %s" % path)
+    return GridFile(path, rows, columns, (robot_row, robot_col), (target_row, target_col),
+                    seed if has_seed else None, bits)
+
+
+def _check(rows, columns, robot, target):
+    if rows < 1 or columns < 1:
+        raise ValueError("empty grid: %d x %d" % (rows, columns))
+    for name, (row, col) in (("robot", robot), ("target", target)):
+        if not (0 <= row < rows and 0 <= col < columns):
+            raise ValueError("%s (%d, %d) outside the %d x %d grid" % (name, row, col, rows, columns))
@@ -0,0 +1,264 @@
+"""
+Generators of random, perfect (without cycles) mazes.
+
+A maze of height x width cells is described by a height x width uint8
+array of passage bits: SOUTH when the cell is connected to the one
+below it, EAST when it is connected to the one on its right. stamp() turns
+it into the obstacles of a (2 * height + 1) x (2 * width + 1) grid, where
+the cells sit at odd rows and columns and everything else is wall unless a
+passage opens it. eller_rows() and stamp_rows() do the same one row at a
+time, for mazes streamed to their destination as they are generated.
+
+MazeCache keeps the generated mazes on disk, so a maze given by its
+generator, size and seed is generated only once and then memory-mapped.
+"""
+import hashlib
+import os
+import random
+import tempfile
+
+import numpy
+
+SOUTH = 1  # passage to the cell below
+EAST = 2  # passage to the cell on the right
+
+
+def growing_tree(height, width, seed=None):
+    """
+    Growing tree algorithm: grows the maze from the top-left cell, continuing
+    from the newest cell of the list most of the time and from a random one
+    1 in 10 times, which gives long corridors with some branching.
+    :param height: the number of rows of cells
+    :param width:  the number of columns of cells
+    :param seed:   seed of the random generator, for a reproducible maze
+    :return:       height x width array with the passages of the maze
+    """
+    rand = random.Random(seed).random
+    # the cells are laid out with a visited border around them, a column on the right
+    # that is also the left one of the next row, which spares the bounds checks
+    stride = width + 1
+    border = numpy.ones((height + 2, stride), dtype=numpy.uint8)
+    border[1:-1, :-1] = 0
+    visited = bytearray(border.tobytes())
+    passages = bytearray(len(visited))
+    visited[stride] = 1
+    cells = [stride]
+    pop = cells.pop
+    push = cells.append
+    while cells:
+        if rand() < 0.1:
+            # swap the random cell to the end, popping from the middle of a long list is too slow
+            i = int(rand() * len(cells))
+            cells[i], cells[-1] = cells[-1], cells[i]
+        cell = pop()
+        # the cells that have yet to be used in generation: right, below, left, above
+        neighbors = []
+        if not visited[cell + 1]:
+            neighbors.append(cell + 1)
+        if not visited[cell + stride]:
+            neighbors.append(cell + stride)
+        if not visited[cell - 1]:
+            neighbors.append(cell - 1)
+        if not visited[cell - stride]:
+            neighbors.append(cell - stride)
+        if not neighbors:
+            continue
+        selected = neighbors[int(rand() * len(neighbors))]
+        visited[selected] = 1
+        # open the wall between the two cells, owned by the upper or the left one
+        step = selected - cell
+        if step == 1:
+            passages[cell] |= EAST
+        elif step == stride:
+            passages[cell] |= SOUTH
+        elif step == -1:
+            passages[selected] |= EAST
+        else:
+            passages[selected] |= SOUTH
+        push(cell)
+        push(selected)
+    return numpy.frombuffer(passages, dtype=numpy.uint8).reshape(height + 2, stride)[1:-1, :-1].copy()
+
+
+def eller_rows(height, width, seed=None):
+    """
+    Eller's algorithm: generates the maze one row at a time, keeping only the
+    sets of connected cells of the current row, so the memory does not depend
+    on the height. Adjacent cells of different sets are joined at random, every
+    set goes down at least once, and the last row joins all remaining sets.
+    :param height: the number of rows of cells
+    :param width:  the number of columns of cells
+    :param seed:   seed of the random generator, for a reproducible maze
+    :return:       generator of the rows of passages, width uint8 arrays
+    """
+    rand = random.Random(seed).random
+    sets = list(range(width))  # the set of every cell of the row, labels below width
+    for r in range(height):
+        last = r == height - 1
+        passages = bytearray(width)
+        parent = list(range(width))  # union-find of the sets joined in this row
+
+        def find(label):
+            while parent[label] != label:
+                parent[label] = label = parent[parent[label]]
+            return label
+
+        # join adjacent cells of different sets, always in the last row
+        for c in range(width - 1):
+            a = find(sets[c])
+            b = find(sets[c + 1])
+            if a != b and (last or rand() < 0.5):
+                parent[b] = a
+                passages[c] |= EAST
+        if not last:
+            # every set goes down from some of its cells, at least one
+            roots = [find(label) for label in sets]
+            members = {}
+            for c, root in enumerate(roots):
+                members.setdefault(root, []).append(c)
+            for cols in members.values():
+                down = [c for c in cols if rand() < 0.5] or [cols[int(rand() * len(cols))]]
+                for c in down:
+                    passages[c] |= SOUTH
+            # the cells below keep the set they came from, the others get labels left unused
+            carried = set(roots[c] for c in range(width) if passages[c] & SOUTH)
+            free = (label for label in range(width) if label not in carried)
+            sets = [roots[c] if passages[c] & SOUTH else next(free) for c in range(width)]
+        yield numpy.frombuffer(passages, dtype=numpy.uint8)
+
+
+def eller(height, width, seed=None):
+    """
+    Eller's algorithm for a whole maze, see eller_rows().
+    :return: height x width array with the passages of the maze
+    """
+    return numpy.array(list(eller_rows(height, width, seed)), dtype=numpy.uint8).reshape(height, width)
+
+
+def stamp_rows(rows, width, obst, empty=0):
+    """
+    Draws a maze given row by row, see stamp().
+    :param rows:  iterable of the rows of passages
+    :param width: the number of columns of cells
+    :return:      generator of the 2 * width + 1 long rows of cell states, two per row of passages after the top wall
+    """
+    wall = numpy.full(2 * width + 1, obst, dtype=numpy.int8)
+    yield wall
+    for passages in rows:
+        cells = wall.copy()
+        cells[1::2] = empty
+        cells[2:-1:2][(passages[:-1] & EAST) != 0] = empty
+        below = wall.copy()
+        below[1::2][(passages & SOUTH) != 0] = empty
+        yield cells
+        yield below
+
+
+def stamp(passages, obst, empty=0):
+    """
+    Draws a maze as a grid of cell states.
+    :param passages: height x width array with the passages of the maze
+    :return: (2 * height + 1) x (2 * width + 1) array with obst on the walls and empty elsewhere
+    """
+    height, width = passages.shape
+    grid = numpy.full((2 * height + 1, 2 * width + 1), obst, dtype=numpy.int8)
+    grid[1::2, 1::2] = empty
+    grid[2:-1:2, 1::2][(passages[:-1] & SOUTH) != 0] = empty
+    grid[1::2, 2:-1:2][(passages[:, :-1] & EAST) != 0] = empty
+    return grid
+
+
+GENERATORS = ("Growing tree", "Eller")  # the names of the generators
+
+
+def generate_rows(generator, height, width, seed=None):
+    """
+    Generates a maze with the named generator.
+    :return: iterable of the rows of passages
+    """
+    if generator == "Eller":
+        return eller_rows(height, width, seed)
+    if generator == "Growing tree":
+        return iter(growing_tree(height, width, seed))
+    raise ValueError("unknown maze generator: %r" % (generator,))
+
+
+class MazeCache(object):
+    """
+    Directory of generated mazes, one .npy file of passages per maze, named
+    after the hash of (generator, height, width, seed). When the files exceed
+    the size limit, the least recently used ones are deleted; using a maze
+    touches its file.
+    """
+    def __init__(self, directory=None, max_bytes=1 << 30):
+        """
+        :param directory: the cache directory, by default $MAZE51_CACHE or ~/.cache/maze51
+        :param max_bytes: the size limit of the cached files
+        """
+        if directory is None:
+            directory = os.environ.get("MAZE51_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "maze51")
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, generator, height, width, seed):
+        key = hashlib.sha1(("%s:%d:%d:%d" % (generator, height, width, seed)).encode()).hexdigest()
+        return os.path.join(self.directory, key + ".npy")
+
+    def get(self, generator, height, width, seed=None):
+        """
+        Returns the passages of a maze, read-only and memory-mapped from the
+        cache, generating them first if they are not there. Mazes without a
+        seed cannot be reproduced and are not cached.
+        """
+        if seed is None:
+            return numpy.array(list(generate_rows(generator, height, width)), dtype=numpy.uint8).reshape(height, width)
+        path = self.path(generator, height, width, seed)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            # write the rows straight into a mapped file, which appears in the cache when complete
+            fd, part = tempfile.mkstemp(suffix=".part", dir=self.directory)
+            os.close(fd)
+            try:
+                maze = numpy.lib.format.open_memmap(part, mode="w+", dtype=numpy.uint8, shape=(height, width))
+                for row, passages in enumerate(generate_rows(generator, height, width, seed)):
+                    maze[row] = passages
+                maze.flush()
+                del maze
+                os.replace(part, path)
+            except BaseException:
+                os.remove(part)
+                raise
+            self.evict(path)
+        return numpy.load(path, mmap_mode="r")
+
+    def evict(self, keep=None):
+        """ Deletes the least recently used mazes until the cache fits its size limit, except keep """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                path = os.path.join(self.directory, name)
+                try:
+                    info = os.stat(path)
+                except OSError:  # deleted meanwhile
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:  # still mapped, on Windows
+                continue
+            total -= size
+
+    def clear(self):
+        """ Deletes all the cached mazes """
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,210 @@
+"""
+Instrumentation of the searches.
+
+SearchStats.attach() wraps, on the instance only, the functions of a
+Search or a Replanner that generate the successors of a cell, maintain the
+OPEN SET and run the search, so their time is measured without slowing down
+the searches that are not instrumented. The time spent in painting is
+added by the user interface. The statistics can be shown as text, or
+written as JSON or in the text format of Prometheus for headless runs.
+"""
+import json
+import sys
+import time
+
+import solver
+
+PHASES = ("successors", "open_set", "other", "painting")
+
+
+class SearchStats(object):
+    """ The statistics of a search: time per phase, expansions, peak set sizes and allocations """
+    def __init__(self):
+        self.search = None  # the instrumented Search or Replanner
+        self.algorithm = None
+        self.diagonal = False
+        self.seconds = {"search": 0.0, "successors": 0.0, "open_set": 0.0, "painting": 0.0}
+        self.expanded = 0  # the nodes expanded, over all the repairs of a Replanner
+        self.runs = 0  # the calls of Search.step() or Replanner.compute()
+        self.peakOpen = 0  # the largest size of the OPEN SET, with the outdated entries for a Replanner
+        self.peakClosed = 0  # the largest size of the CLOSED SET
+        self.blocks = sys.getallocatedblocks()  # the memory blocks allocated by Python when attached
+        self.allocated = None  # the blocks allocated by the search, known once it ended or after a measured step
+        self.stepBlocks = False  # flag that the blocks are measured around every step
+        self.outside = 0  # the blocks allocated between the measured steps, which are not the search's
+        self.lastBlocks = None  # the blocks allocated by Python after the last measured step
+        self.frames = 0  # the frames drawn by an animation of the search
+        self.animationSeconds = 0.0  # the time from the start of the animation to its last frame
+
+    def attach(self, search, step_blocks=False):
+        """
+        Instruments a Search or a Replanner. The memory blocks of a Search
+        are counted from attach() to its end, unless step_blocks is set.
+        :param step_blocks: flag that the blocks allocated between the steps, e.g. by painting, are left out, at the
+                            cost of a slower step; they always are between the repairs of a Replanner
+        :return: the search
+        """
+        self.search = search
+        self.diagonal = search.diagonal
+        self.blocks = sys.getallocatedblocks()
+        self.stepBlocks = step_blocks
+        search.neighbors = self.timed("successors", search.neighbors)
+        if isinstance(search, solver.Replanner):
+            self.algorithm = "D* Lite"
+            self.peakClosed = None  # the replanner has no CLOSED SET to count
+            search.push = self.timed("open_set", search.push)
+            search.top = self.timed("open_set", search.top)
+            search.compute = self.timed("search", self.measured(search.compute), self.count_repair)
+        else:
+            self.algorithm = search.algorithm
+            search.add_to_open = self.timed("open_set", search.add_to_open)
+            search.pop_open = self.timed("open_set", search.pop_open)
+            search.step = self.timed("search", self.measured(search.step) if step_blocks else search.step,
+                                     self.count_step)
+        return search
+
+    def timed(self, phase, function, after=None):
+        """ Returns function, adding the time of its calls to the phase and calling after() after them """
+        seconds = self.seconds
+        clock = time.perf_counter
+
+        def timed_function(*args):
+            began = clock()
+            try:
+                return function(*args)
+            finally:
+                seconds[phase] += clock() - began
+                if after is not None:
+                    after()
+        return timed_function
+
+    def measured(self, function):
+        """ Returns function, adding the memory blocks allocated since the last measured call to outside """
+        def measured_function(*args):
+            if self.lastBlocks is not None:
+                self.outside += sys.getallocatedblocks() - self.lastBlocks
+            return function(*args)
+        return measured_function
+
+    def count_step(self):
+        search = self.search
+        self.runs += 1
+        self.expanded = search.expanded
+        self.peakOpen = max(self.peakOpen, search.openCount)
+        self.peakClosed = max(self.peakClosed, search.closedCount)
+        if self.stepBlocks:
+            self.count_blocks()
+        elif search.done and self.allocated is None:
+            self.allocated = sys.getallocatedblocks() - self.blocks
+
+    def count_repair(self):
+        search = self.search
+        self.runs += 1
+        self.expanded += search.expanded
+        self.peakOpen = max(self.peakOpen, len(search.queue))
+        self.count_blocks()
+
+    def count_blocks(self):
+        """ Counts the blocks allocated since attach(), but not between the measured steps """
+        self.lastBlocks = sys.getallocatedblocks()
+        self.allocated = self.lastBlocks - self.blocks - self.outside
+
+    def count_frame(self, elapsed):
+        """ Counts a frame of an animation, drawn elapsed seconds after it started """
+        self.frames += 1
+        self.animationSeconds = elapsed
+
+    def copy(self):
+        """ Returns a copy whose times and counts can grow apart from these """
+        stats = SearchStats.__new__(SearchStats)
+        stats.__dict__.update(self.__dict__)
+        stats.seconds = dict(self.seconds)
+        return stats
+
+    def add_time(self, phase, seconds):
+        """ Adds time spent outside the search, such as painting """
+        self.seconds[phase] += seconds
+
+    def as_dict(self):
+        seconds = self.seconds
+        other = seconds["search"] - seconds["successors"] - seconds["open_set"]
+        return {"algorithm": self.algorithm, "diagonal": self.diagonal,
+                "expanded": self.expanded, "runs": self.runs,
+                "reopened": getattr(self.search, "reopened", None),
+                "peak_open": self.peakOpen, "peak_closed": self.peakClosed,
+                "seconds": {"search": seconds["search"], "successors": seconds["successors"],
+                            "open_set": seconds["open_set"], "other": max(other, 0.0),
+                            "painting": seconds["painting"]},
+                "nodes_per_second": self.expanded / seconds["search"] if seconds["search"] else None,
+                "allocated_blocks_per_expansion": self.allocated / self.expanded
+                if self.allocated is not None and self.expanded else None,
+                "frames": self.frames,
+                "frames_per_second": self.frames / self.animationSeconds if self.animationSeconds else None,
+                "animation_nodes_per_second": self.expanded / self.animationSeconds if self.animationSeconds else None}
+
+    def text(self):
+        """ Returns the statistics as lines of text for the user interface """
+        stats = self.as_dict()
+        seconds = stats["seconds"]
+        lines = ["Algorithm: %s%s" % (stats["algorithm"], ", diagonal" if stats["diagonal"] else ""),
+                 "Expanded: %d%s" % (stats["expanded"],
+                                     "" if stats["reopened"] is None else ", reopened: %d" % stats["reopened"]),
+                 "Peak OPEN: %d, CLOSED: %s" % (stats["peak_open"], "-" if stats["peak_closed"] is None
+                                                 else stats["peak_closed"]),
+                 "Nodes/sec: %s" % ("-" if stats["nodes_per_second"] is None else "%.0f" % stats["nodes_per_second"]),
+                 "Blocks/expansion: %s" % ("-" if stats["allocated_blocks_per_expansion"] is None
+                                           else "%.2f" % stats["allocated_blocks_per_expansion"])]
+        lines += ["%-11s %9.1f ms" % (phase.replace("_", " ").capitalize() + ":", 1000 * seconds[phase])
+                  for phase in PHASES]
+        if stats["frames_per_second"] is not None:
+            lines.append("Animation: %.1f frames/sec, %.0f nodes/sec" % (stats["frames_per_second"],
+                                                                       stats["animation_nodes_per_second"]))
+        return "\n".join(lines)
+
+
+def prometheus(records):
+    """
+    Formats statistics in the text format of Prometheus.
+    :param records: list of (labels, statistics), labels being a dict of strings and statistics a SearchStats.as_dict()
+    """
+    gauges = (("maze51_search_seconds", "Time spent in a phase of the search", "phase"),
+              ("maze51_search_expanded_nodes", "Nodes expanded", "expanded"),
+              ("maze51_search_reopened_nodes", "Closed nodes reopened by a better evaluation", "reopened"),
+              ("maze51_search_peak_open_cells", "Largest size of the OPEN SET", "peak_open"),
+              ("maze51_search_peak_closed_cells", "Largest size of the CLOSED SET", "peak_closed"),
+              ("maze51_search_nodes_per_second", "Nodes expanded per second of search", "nodes_per_second"),
+              ("maze51_search_allocated_blocks_per_expansion", "Net Python memory blocks allocated per expansion",
+               "allocated_blocks_per_expansion"),
+              ("maze51_animation_frames_per_second", "Frames drawn per second by the animation", "frames_per_second"),
+              ("maze51_animation_nodes_per_second", "Nodes expanded per second of animation",
+               "animation_nodes_per_second"))
+    lines = []
+    for name, help_text, key in gauges:
+        lines.append("# HELP %s %s" % (name, help_text))
+        lines.append("# TYPE %s gauge" % name)
+        for labels, stats in records:
+            labels = dict(labels, algorithm=stats["algorithm"], diagonal=str(stats["diagonal"]).lower())
+            if key == "phase":
+                for phase in PHASES:
+                    lines.append("%s{%s} %r" % (name, _labels(dict(labels, phase=phase)), stats["seconds"][phase]))
+            elif stats[key] is not None:
+                lines.append("%s{%s} %r" % (name, _labels(labels), stats[key]))
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    return ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for key, value in sorted(labels.items()))
+
+
+def write(path, records):
+    """
+    Writes statistics to a file, in the format of Prometheus if its name ends
+    with .prom, as a JSON list otherwise.
+    :param records: list of (labels, statistics), labels being a dict of strings and statistics a SearchStats.as_dict()
+    """
+    with open(path, "w") as f:
+        if path.endswith(".prom"):
+            f.write(prometheus(records))
+        else:
+            json.dump([dict(stats, labels=labels) for labels, stats in records], f, indent=1)
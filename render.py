@@ -0,0 +1,148 @@
+"""
+Renderers that draw the grid of Maze51 on its canvas.
+
+A renderer only draws the cells of the viewport, given as
+(top row, left column, rows, columns, square size). Both renderers remember
+the state whose color every visible cell shows, so painting a cell that
+already has the right color costs nothing and repainting the grid, or
+panning the viewport, only touches the cells that changed on screen.
+"""
+from tkinter import PhotoImage
+
+import numpy
+
+BACKGROUND = "DARK GREY"  # the color of the lines between the cells
+
+
+class ItemRenderer(object):
+    """ Draws every visible cell as a canvas rectangle, created once per viewport size """
+    def __init__(self, canvas, colors):
+        self.canvas = canvas
+        self.colors = colors  # the color of every cell state
+        self.items = []  # the canvas rectangles of the cells
+        self.painted = None  # the state whose color each rectangle currently shows
+        self.size = None  # (rows, columns, square_size) of the rectangles
+        self.top = self.left = 0  # the grid cell shown by the top-left rectangle
+
+    def reset(self, view):
+        """ Moves to the viewport, creating the rectangles unless it keeps the size they were made for """
+        self.top, self.left, rows, columns, square_size = view
+        if self.size == (rows, columns, square_size):
+            return
+        self.size = (rows, columns, square_size)
+        self.canvas.delete("cells")
+        self.canvas.create_rectangle(0, 0, columns * square_size + 1, rows * square_size + 1, width=0, fill=BACKGROUND, tags="cells")
+        self.items = []
+        for r in range(rows):
+            for c in range(columns):
+                self.items.append(self.canvas.create_rectangle(1 + c * square_size, 1 + r * square_size, 1 + (c + 1) * square_size - 1, 1 + (r + 1) * square_size - 1, width=0, fill=self.colors[0], tags="cells"))
+        self.canvas.tag_lower("cells")
+        self.painted = numpy.zeros((rows, columns), dtype=numpy.int8)
+
+    def paint(self, row, col, state):
+        row -= self.top
+        col -= self.left
+        if 0 <= row < self.size[0] and 0 <= col < self.size[1] and self.painted[row, col] != state:
+            self.canvas.itemconfigure(self.items[row * self.size[1] + col], fill=self.colors[state])
+            self.painted[row, col] = state
+
+    def repaint(self, grid):
+        """ Repaints the visible cells whose state differs from the color they show """
+        states = grid[self.top:self.top + self.size[0], self.left:self.left + self.size[1]]
+        changed = numpy.flatnonzero(states != self.painted).tolist()
+        painted = self.painted.ravel()
+        states = states.ravel()
+        for i in changed:
+            self.canvas.itemconfigure(self.items[i], fill=self.colors[states[i]])
+            painted[i] = states[i]
+
+
+class ImageRenderer(object):
+    """
+    Draws the visible cells as a single PhotoImage.
+
+    The states are mapped through a palette to RGB pixels in one NumPy step.
+    Painted cells only extend a dirty rectangle, which is written into the
+    image once the event loop is idle, so the cells changed by a burst of
+    paints are transferred to Tk together.
+    """
+    def __init__(self, canvas, colors):
+        self.canvas = canvas
+        # the palette: one RGB triple per cell state, plus the background as last entry
+        names = [colors[state] for state in sorted(colors)] + [BACKGROUND]
+        self.palette = numpy.array([[value >> 8 for value in canvas.winfo_rgb(name)] for name in names], dtype=numpy.uint8)
+        self.image = None
+        self.item = None
+        self.painted = None
+        self.size = None
+        self.top = self.left = 0
+        self.dirty = None  # [r0, r1, c0, c1] of the cells waiting to be written into the image
+        self.scheduled = False
+
+    def reset(self, view):
+        """ Moves to the viewport, creating a new image unless it keeps the size of the current one """
+        self.top, self.left, rows, columns, square_size = view
+        if self.size != (rows, columns, square_size):
+            self.size = (rows, columns, square_size)
+            self.canvas.delete("cells")
+            width, height = columns * square_size + 1, rows * square_size + 1
+            self.image = PhotoImage(master=self.canvas, width=width, height=height)
+            self.item = self.canvas.create_image(0, 0, image=self.image, anchor="nw", tags="cells")
+            self.canvas.tag_lower("cells")
+            # the lines around the cells, which flush() never overwrites
+            self.image.put("#%02x%02x%02x" % tuple(self.palette[-1].tolist()), to=(0, 0, width, height))
+            self.painted = numpy.zeros((rows, columns), dtype=numpy.int8)
+            self.mark(0, rows, 0, columns)
+            self.flush()
+
+    def paint(self, row, col, state):
+        row -= self.top
+        col -= self.left
+        if 0 <= row < self.size[0] and 0 <= col < self.size[1] and self.painted[row, col] != state:
+            self.painted[row, col] = state
+            self.mark(row, row + 1, col, col + 1)
+
+    def repaint(self, grid):
+        """ Repaints the visible cells whose state differs from the color they show """
+        states = grid[self.top:self.top + self.size[0], self.left:self.left + self.size[1]]
+        changed = states != self.painted
+        rows = numpy.flatnonzero(changed.any(axis=1))
+        if not rows.size:
+            return
+        cols = numpy.flatnonzero(changed.any(axis=0))
+        self.painted[...] = states
+        self.mark(rows[0], rows[-1] + 1, cols[0], cols[-1] + 1)
+
+    def mark(self, r0, r1, c0, c1):
+        """ Extends the dirty rectangle and schedules writing it into the image """
+        if self.dirty is None:
+            self.dirty = [r0, r1, c0, c1]
+        else:
+            self.dirty = [min(self.dirty[0], r0), max(self.dirty[1], r1), min(self.dirty[2], c0), max(self.dirty[3], c1)]
+        if not self.scheduled:
+            self.scheduled = True
+            self.canvas.after_idle(self.flush)
+
+    def pixels(self, r0, r1, c0, c1):
+        """ Returns the RGB pixels of a block of cells, with the lines between them """
+        s = self.size[2]
+        rgb = self.palette[self.painted[r0:r1, c0:c1]]
+        if s < 3:  # too small for lines between the cells
+            return rgb.repeat(s, axis=0).repeat(s, axis=1)
+        block = numpy.empty(((r1 - r0) * s, (c1 - c0) * s, 3), dtype=numpy.uint8)
+        block[...] = self.palette[-1]
+        cells = block.reshape(r1 - r0, s, c1 - c0, s, 3)
+        cells[:, :s - 1, :, :s - 1] = rgb[:, None, :, None]
+        return block
+
+    def flush(self):
+        """ Writes the dirty rectangle into the image """
+        self.scheduled = False
+        if self.dirty is None:
+            return
+        r0, r1, c0, c1 = self.dirty
+        self.dirty = None
+        s = self.size[2]
+        block = self.pixels(r0, r1, c0, c1)
+        ppm = b"P6 %d %d 255\n" % (block.shape[1], block.shape[0]) + block.tobytes()
+        self.image.put(ppm, to=(1 + c0 * s, 1 + r0 * s))
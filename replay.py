@@ -0,0 +1,173 @@
+"""
+Traces of searches, recorded as arrays of events, and their replay.
+
+A Recorder attached to a search logs every change of state that the search
+reports, as one EVENT record: the step, the flat cell index, the new state
+and the one it replaces, and the predecessor of the cell after and before.
+The records are kept in a NumPy array that grows by doubling, 18 bytes per
+change and no Python object. A Trace also holds the walls of the grid,
+packed as in grid files, the robot, the target and the path found, and is
+saved as a NumPy .npz archive.
+
+A Player moves through a trace in both directions and jumps to any step,
+applying or undoing only the events in between, and returns the cells that
+changed, so a replay repaints only them.
+"""
+import json
+import zipfile
+
+import numpy
+
+EVENT = numpy.dtype([("step", "<u4"), ("cell", "<u4"), ("state", "u1"), ("previous", "u1"),
+                     ("parent", "<i4"), ("previous_parent", "<i4")])
+EXTENSION = ".trace"
+VERSION = 1
+
+
+class Trace(object):
+    """ A recorded search """
+    def __init__(self, rows, columns, start, target, algorithm, diagonal, bits, events, steps, path, expanded):
+        self.rows = rows
+        self.columns = columns
+        self.start = start  # the (row, col) of the robot
+        self.target = target  # the (row, col) of the target
+        self.algorithm = algorithm
+        self.diagonal = diagonal
+        self.bits = bits  # the walls, packed by numpy.packbits along the rows
+        self.events = events  # the EVENT records, in the order of the steps
+        self.steps = steps  # the number of steps that changed cells
+        self.path = path  # the flat indices of the cells from the robot to the target, empty if not found
+        self.expanded = expanded  # the nodes expanded by the search
+
+    def walls(self):
+        """ Returns the walls as a rows x columns boolean array """
+        return numpy.unpackbits(self.bits, axis=1, count=self.columns).view(bool)
+
+    def save(self, path):
+        """ Writes the trace to a file """
+        info = {"version": VERSION, "rows": self.rows, "columns": self.columns, "start": list(self.start),
+                "target": list(self.target), "algorithm": self.algorithm, "diagonal": self.diagonal,
+                "steps": self.steps, "expanded": self.expanded}
+        with open(path, "wb") as f:  # an open file keeps numpy from appending .npz to the name
+            numpy.savez_compressed(f, info=numpy.array(json.dumps(info)), bits=self.bits, events=self.events,
+                                   path=self.path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a trace file.
+        :raises ValueError: if the file is not a valid trace
+        """
+        try:
+            archive = numpy.load(path)  # refuses pickled data, such as a text file, with a ValueError
+        except (ValueError, EOFError, zipfile.BadZipFile) as e:
+            raise ValueError("not a trace file: %s (%s)" % (path, e))
+        if not isinstance(archive, numpy.lib.npyio.NpzFile):  # a .npy file gives a bare array
+            raise ValueError("not a trace file: %s" % path)
+        try:
+            with archive:
+                info = json.loads(str(archive["info"]))
+                bits, events, route = archive["bits"], archive["events"], archive["path"]
+            if info.get("version") != VERSION:
+                raise ValueError("unsupported trace version %r: %s" % (info.get("version"), path))
+            if events.dtype != EVENT or bits.shape != (info["rows"], (info["columns"] + 7) // 8):
+                raise ValueError("corrupt trace file: %s" % path)
+            return cls(info["rows"], info["columns"], tuple(info["start"]), tuple(info["target"]), info["algorithm"],
+                       info["diagonal"], bits, events, info["steps"], route, info["expanded"])
+        except (KeyError, TypeError, AttributeError, EOFError, zipfile.BadZipFile, json.JSONDecodeError) as e:
+            raise ValueError("not a trace file: %s (%s)" % (path, e))
+
+
+class Recorder(object):
+    """
+    Records the changes reported by the step() of a search.
+    :param walls: 2d boolean array of the obstacles of the grid searched
+    """
+    def __init__(self, walls):
+        walls = numpy.asarray(walls, dtype=bool)
+        self.rows, self.columns = walls.shape
+        self.bits = numpy.packbits(walls, axis=1)
+        self.search = None
+        self.events = numpy.zeros(1024, dtype=EVENT)
+        self.count = 0  # the events recorded
+        self.steps = 0  # the steps that changed cells
+        self.states = numpy.zeros(self.rows * self.columns, dtype=numpy.uint8)  # the state of every cell so far
+        self.parents = numpy.full(self.rows * self.columns, -1, dtype=numpy.int32)  # its predecessor so far
+
+    def attach(self, search):
+        """
+        Records a Search, wrapping its step() on the instance only.
+        :return: the search
+        """
+        self.search = search
+        step = search.step
+
+        def recorded_step(*args):
+            changes = step(*args)
+            if changes:
+                self.record(changes)
+            return changes
+        search.step = recorded_step
+        return search
+
+    def record(self, changes):
+        """ Logs the (row, col, state) changes of a step """
+        self.steps += 1
+        if self.count + len(changes) > len(self.events):
+            self.events = numpy.resize(self.events, max(2 * len(self.events), self.count + len(changes)))
+        events, states, parents = self.events, self.states, self.parents
+        for r, c, state in changes:
+            cell = r * self.columns + c
+            parent = self.search.parent_of(r, c)
+            parent = -1 if parent is None else parent[0] * self.columns + parent[1]
+            events[self.count] = (self.steps, cell, state, states[cell], parent, parents[cell])
+            states[cell] = state
+            parents[cell] = parent
+            self.count += 1
+
+    def trace(self):
+        """ Returns the Trace of the search recorded so far """
+        search = self.search
+        start, target = divmod(int(search.start), self.columns), divmod(int(search.target), self.columns)
+        path = numpy.array([r * self.columns + c for r, c in search.path()], dtype=numpy.int32)
+        return Trace(self.rows, self.columns, start, target, search.algorithm, search.diagonal, self.bits,
+                     self.events[:self.count].copy(), self.steps, path, search.expanded)
+
+
+class Player(object):
+    """ A position in a trace, which can move to any step """
+    def __init__(self, trace):
+        self.trace = trace
+        self.step = 0  # the steps applied
+        self.states = numpy.zeros(trace.rows * trace.columns, dtype=numpy.uint8)  # the state of every cell at the step
+        self.parents = numpy.full(trace.rows * trace.columns, -1, dtype=numpy.int32)  # its predecessor at the step
+        # ends[s] is the number of events of the steps up to s
+        self.ends = numpy.searchsorted(trace.events["step"], numpy.arange(trace.steps + 1), side="right")
+
+    def seek(self, step):
+        """
+        Moves to a step, from 0 before the search to trace.steps at its end.
+        :return: the flat indices of the cells whose state changed
+        """
+        step = min(max(step, 0), self.trace.steps)
+        begin, end = self.ends[self.step], self.ends[step]
+        forward = step > self.step
+        if forward:
+            # the last event of every cell decides its new state
+            events = self.trace.events[begin:end][::-1]
+        else:
+            # undone, every cell gets the state its first event replaced
+            events = self.trace.events[end:begin]
+        self.step = step
+        if not len(events):
+            return numpy.zeros(0, dtype=numpy.int64)
+        cells, first = numpy.unique(events["cell"], return_index=True)
+        events = events[first]
+        self.states[cells] = events["state"] if forward else events["previous"]
+        self.parents[cells] = events["parent"] if forward else events["previous_parent"]
+        return cells.astype(numpy.int64)
+
+    def parent_of(self, r, c):
+        """ Returns the (row, col) of the predecessor of (r, c) at the step, or None """
+        parent = self.parents[r * self.trace.columns + c]
+        return None if parent < 0 else divmod(int(parent), self.trace.columns)
@@ -0,0 +1,315 @@
+"""
+A local HTTP/JSON service that solves path queries for other tools.
+
+    python AIassg.py serve --port 8051 --workers 4 --grid mazes/big.maze
+
+The server listens on localhost only. Uploaded grids stay resident until
+they are deleted: their walls are packed into shared memory as in the batch
+solver, and the pool of worker processes, started with the server, keeps the
+neighbor tables of the grids it solved on last, so the queries on a grid in
+use do not build them again. A grid sent with a query is shared for that
+request only. The queries are solved by batch.solve_task(), with the
+searches of Maze51.
+
+    POST /grids         {"walls": ["..#..", ...]} with '#' for the obstacles,
+                        or {"path": "grid.maze"} for a grid file on the server
+                        -> {"grid": id, "rows": ..., "columns": ...}
+    DELETE /grids/<id>  drops a resident grid
+    POST /solve         {"grid": id or the object of POST /grids, "start": [row, col],
+                         "target": [row, col], "algorithm": "A*", "diagonal": false or true}
+                        -> the fields of a line of the batch solver, with the path;
+                        {"queries": [...]} solves a batch in parallel, answered in order
+    GET /stats          the requests, the queue depth, the resident grids and the
+                        latency percentiles, in JSON
+    GET /metrics        the same in the text format of Prometheus
+
+The start and target default to the robot and target of a grid file.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import resource_tracker
+
+import numpy
+
+import batch
+import gridfile
+import solver
+
+HOST = "127.0.0.1"  # the server is only reachable from this machine
+PORT = 8051
+LATENCY_WINDOW = 1000  # the latest requests whose latencies give the percentiles
+PERCENTILES = (50, 90, 99)
+WALL = ord("#")
+
+
+class SolveService(object):
+    """
+    The resident grids, the worker pool and the measures of a server.
+    :param workers: the number of worker processes
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        # the workers share the tracker of the shared memory blocks, created later, instead of starting their own
+        resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(workers)
+        self.lock = threading.Lock()
+        self.grids = {}  # the resident grids: id -> (GridFile, SharedMemory)
+        self.queued = 0  # the queries handed to the pool and not answered yet
+        self.requests = 0  # the solve requests answered
+        self.queries = 0  # the queries solved
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # the seconds taken by the latest solve requests
+
+    def add_grid(self, spec):
+        """
+        Makes a grid resident, unless it already is.
+        :param spec: {"walls": list of strings, '#' for the obstacles} or {"path": grid file}
+        :return: (id, GridFile) of the grid, read under the lock, since a DELETE may drop it right after
+        :raises ValueError: if the grid is invalid
+        """
+        grid_id, grid_file = self.read_grid(spec)
+        with self.lock:
+            if grid_id not in self.grids:
+                self.grids[grid_id] = (grid_file, batch.share(grid_file))
+            return grid_id, self.grids[grid_id][0]
+
+    def read_grid(self, spec):
+        """
+        Reads a grid without making it resident.
+        :param spec: as for add_grid()
+        :return: (id, GridFile)
+        :raises ValueError: if the grid is invalid
+        """
+        if "path" in spec:
+            grid_file = gridfile.load(spec["path"])
+        else:
+            walls = spec.get("walls")
+            if not walls or not isinstance(walls, list) or not all(isinstance(row, str) for row in walls):
+                raise ValueError("'walls' must be a list of strings, '#' for the obstacles")
+            rows, columns = len(walls), len(walls[0])
+            if not columns or any(len(row) != columns for row in walls):
+                raise ValueError("the rows of 'walls' must have the same, non-zero length")
+            cells = numpy.frombuffer("".join(walls).encode("latin-1", "replace"), dtype=numpy.uint8)
+            bits = numpy.packbits((cells == WALL).reshape(rows, columns), axis=1)
+            grid_file = gridfile.GridFile(None, rows, columns, None, None, None, bits)
+        grid_id = hashlib.sha1(b"%d:%d:" % (grid_file.rows, grid_file.columns) +
+                               numpy.ascontiguousarray(grid_file.bits).tobytes()).hexdigest()[:16]
+        return grid_id, grid_file
+
+    def remove_grid(self, grid_id):
+        """ Drops a resident grid; the workers drop its neighbor tables as they solve on other grids """
+        with self.lock:
+            grid_file, block = self.grids.pop(grid_id)
+        block.close()
+        block.unlink()
+
+    def task(self, query, shared):
+        """
+        Turns a query into a task of batch.solve_task(). A grid sent with the
+        query, and not resident, is shared once the query is known to be valid.
+        :param shared: dict of the blocks of shared memory made for the grids of the request, by grid id, released
+                       after it
+        :raises ValueError: if the query is invalid
+        """
+        algorithm = query.get("algorithm", "A*")
+        if algorithm not in solver.ALGORITHMS:
+            raise ValueError("unknown algorithm %r, expected one of %s" % (algorithm, ", ".join(solver.ALGORITHMS)))
+        diagonal = query.get("diagonal", False)
+        if not isinstance(diagonal, bool):
+            raise ValueError("'diagonal' must be true or false")
+        grid = query.get("grid")
+        if isinstance(grid, dict):
+            grid_id, grid_file = self.read_grid(grid)
+        else:
+            grid_id = grid
+            with self.lock:
+                if grid_id not in self.grids:
+                    raise ValueError("unknown grid: %r" % (grid_id,))
+                grid_file = self.grids[grid_id][0]
+        cells = []
+        for name, default in (("start", grid_file.robot), ("target", grid_file.target)):
+            cell = query.get(name, default)
+            if cell is None:
+                raise ValueError("'%s' is required" % name)
+            try:
+                row, col = (int(value) for value in cell)
+            except (TypeError, ValueError):
+                raise ValueError("'%s' must be [row, col]" % name)
+            if not (0 <= row < grid_file.rows and 0 <= col < grid_file.columns):
+                raise ValueError("'%s' %s is outside the %d x %d grid" % (name, (row, col), grid_file.rows,
+                                                                         grid_file.columns))
+            cells.append((row, col))
+        with self.lock:
+            block = self.grids[grid_id][1] if grid_id in self.grids else None
+        if block is None:
+            if grid_id not in shared:
+                shared[grid_id] = batch.share(grid_file)
+            block = shared[grid_id]
+        return (block.name, grid_file.rows, grid_file.columns, grid_id, cells[0], cells[1], algorithm, diagonal,
+                False, None, True)
+
+    def solve(self, queries):
+        """
+        Solves queries in parallel on the worker pool.
+        :return: the records of the queries, in their order
+        :raises ValueError: if a query is invalid
+        """
+        began = time.perf_counter()
+        shared = {}
+        try:
+            tasks = [self.task(query, shared) for query in queries]
+            return self.run(tasks, began)
+        finally:
+            for block in shared.values():
+                block.close()
+                block.unlink()
+
+    def run(self, tasks, began):
+        """ Solves tasks on the worker pool, measuring the request begun at began """
+        with self.lock:
+            self.queued += len(tasks)
+        records = []
+        try:
+            for record in self.pool.imap(batch.solve_task, tasks,
+                                         chunksize=max(len(tasks) // (4 * self.workers), 1)):
+                record["grid"] = record.pop("maze")
+                records.append(record)
+                with self.lock:
+                    self.queued -= 1
+        finally:
+            with self.lock:
+                self.queued -= len(tasks) - len(records)
+                self.requests += 1
+                self.queries += len(records)
+                self.latencies.append(time.perf_counter() - began)
+        return records
+
+    def stats(self):
+        """ Returns the measures of the service """
+        with self.lock:
+            latencies = numpy.array(self.latencies)
+            stats = {"requests": self.requests, "queries": self.queries, "queue_depth": self.queued,
+                     "grids": len(self.grids), "workers": self.workers}
+        stats["latency_seconds"] = {"p%d" % p: float(numpy.percentile(latencies, p)) if len(latencies) else None
+                                    for p in PERCENTILES}
+        return stats
+
+    def prometheus(self):
+        """ Returns the measures of the service in the text format of Prometheus """
+        stats = self.stats()
+        lines = []
+        for name, help_text, kind, value in (
+                ("maze51_server_requests_total", "Solve requests answered", "counter", stats["requests"]),
+                ("maze51_server_queries_total", "Queries solved", "counter", stats["queries"]),
+                ("maze51_server_queue_depth", "Queries waiting for or running on a worker", "gauge", stats["queue_depth"]),
+                ("maze51_server_resident_grids", "Grids kept in shared memory", "gauge", stats["grids"])):
+            lines += ["# HELP %s %s" % (name, help_text), "# TYPE %s %s" % (name, kind), "%s %r" % (name, value)]
+        name = "maze51_server_latency_seconds"
+        lines += ["# HELP %s Latency of the latest solve requests" % name, "# TYPE %s gauge" % name]
+        for p in PERCENTILES:
+            value = stats["latency_seconds"]["p%d" % p]
+            if value is not None:
+                lines.append('%s{quantile="%r"} %r' % (name, p / 100, value))
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.pool.terminate()
+        with self.lock:
+            grids, self.grids = self.grids, {}
+        for grid_file, block in grids.values():
+            block.close()
+            block.unlink()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """ Answers the requests of a server whose attribute service is the SolveService """
+    protocol_version = "HTTP/1.1"  # keeps the connections of the clients open between requests
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.reply(200, self.server.service.stats())
+        elif self.path == "/metrics":
+            self.reply(200, self.server.service.prometheus(), "text/plain; version=0.0.4")
+        else:
+            self.reply(404, {"error": "not found: %s" % self.path})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            if self.path == "/grids":
+                grid_id, grid_file = self.server.service.add_grid(body)
+                self.reply(200, {"grid": grid_id, "rows": grid_file.rows, "columns": grid_file.columns})
+            elif self.path == "/solve":
+                if "queries" in body:
+                    self.reply(200, {"results": self.server.service.solve(body["queries"])})
+                else:
+                    self.reply(200, self.server.service.solve([body])[0])
+            else:
+                self.reply(404, {"error": "not found: %s" % self.path})
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.reply(400, {"error": str(e)})
+
+    def do_DELETE(self):
+        grid_id = self.path[len("/grids/"):] if self.path.startswith("/grids/") else None
+        try:
+            self.server.service.remove_grid(grid_id)
+        except KeyError:
+            self.reply(404, {"error": "unknown grid: %s" % grid_id})
+            return
+        self.reply(200, {"grid": grid_id})
+
+    def reply(self, status, content, content_type="application/json"):
+        body = (content if isinstance(content, str) else json.dumps(content)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="AIassg.py serve", description="Solves path queries sent as JSON over "
+                                                                        "HTTP, on localhost only.")
+    parser.add_argument("-p", "--port", type=int, default=PORT, help="the port (default: %d, 0 for any)" % PORT)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="the number of worker processes")
+    parser.add_argument("-g", "--grid", action="append", default=[],
+                        help="a grid file made resident at start, may be repeated")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    service = SolveService(max(args.workers, 1))
+    try:
+        for path in args.grid:
+            try:
+                sys.stderr.write("%s: grid %s\n" % (path, service.add_grid({"path": path})[0]))
+            except (OSError, ValueError) as e:
+                parser.error(str(e))
+        server = ThreadingHTTPServer((HOST, args.port), RequestHandler)
+        server.daemon_threads = True
+        server.service = service
+        server.verbose = args.verbose
+        sys.stderr.write("Serving on http://%s:%d/\n" % server.server_address)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # frees the shared memory on terminate
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    finally:
+        service.close()
+    return 0
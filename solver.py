@@ -0,0 +1,1118 @@
+"""
+Headless search engine of The Maze Runner.
+
+The engine knows nothing about Tkinter: it receives the grid as an array of
+cell states, the positions of the robot and the target, the algorithm and
+the diagonal flag, and it produces the path, the number of expanded nodes,
+the distance traveled and the final OPEN / CLOSED sets. Maze51 only drives
+it one step at a time and paints the cells the engine reports as changed.
+"""
+import hashlib
+import heapq
+import itertools
+import math
+import sys
+from collections import OrderedDict, deque
+
+import numpy
+
+INFINITY = sys.maxsize  # The representation of the infinite
+EMPTY = 0  # empty cell
+OBST = 1  # cell with obstacle
+ROBOT = 2  # the position of the robot
+TARGET = 3  # the position of the target
+FRONTIER = 4  # cells that form the frontier (OPEN SET)
+CLOSED = 5  # cells that form the CLOSED SET
+ROUTE = 6  # cells that form the robot-to-target path
+SQRT2 = math.sqrt(2)  # the length of a diagonal move
+EPSILON = 1e-9  # the tolerance when comparing sums of move lengths
+CLUSTER_SIZE = 16  # the rows and columns of the clusters of HPA*
+ENTRANCE_SPLIT = 6  # the entrances of HPA* longer than this are crossed at both ends instead of the middle
+
+ALGORITHMS = ("DFS", "BFS", "A*", "Greedy", "some", "JPS", "HPA*", "Bi-BFS", "Bi-Dijkstra", "Bi-A*")
+INCREMENTAL = ("A*", "some")  # the algorithms whose shortest paths Replanner can maintain
+BIDIRECTIONAL = ("Bi-BFS", "Bi-Dijkstra", "Bi-A*")  # the algorithms of BidirectionalSearch
+
+# With diagonal movements priority is:
+# 1: Up 2: Up-right 3: Right 4: Down-right 5: Down 6: Down-left 7: Left 8: Up-left
+# Without diagonal movements the priority is:  1: Up 2: Right 3: Down 4: Left
+DIRECTIONS_4 = ((-1, 0), (0, 1), (1, 0), (0, -1))
+DIRECTIONS_8 = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+
+# States of a cell during the search (the state array of Search)
+UNSEEN = 0
+OPEN = 1
+SHUT = 2
+
+
+class Adjacency(object):
+    """
+    Precomputed neighbor tables of a grid, shared by all the searches on it.
+
+    For every cell a table holds one byte whose bit k is set when the move in
+    the k-th direction of DIRECTIONS_4 / DIRECTIONS_8 is allowed, i.e. stays in
+    the grid, does not hit an obstacle and does not cut a corner between two
+    obstacles. The neighbors of a cell are then its flat index plus the offsets
+    of the set bits, in priority order. Painting or erasing an obstacle only
+    rewrites the 3x3 block of cells around it.
+    :param grid: 2d array of cell states; only OBST cells are treated as walls
+    """
+    def __init__(self, grid):
+        grid = numpy.asarray(grid)
+        self._allocate(*grid.shape)
+        self.walls[...] = grid == OBST
+
+    @classmethod
+    def from_bits(cls, bits, columns, chunk_rows=4096):
+        """
+        Builds the tables from walls packed by numpy.packbits along the rows, e.g.
+        memory-mapped from a grid file. The bits are unpacked a chunk of rows at
+        a time straight into the walls of the tables, without a grid of cell
+        states in between, but the tables still take a byte per cell each.
+        :param bits:    rows x ((columns + 7) // 8) array of packed walls
+        :param columns: the number of columns of the grid
+        """
+        adjacency = cls.__new__(cls)
+        adjacency._allocate(len(bits), columns)
+        for r0 in range(0, adjacency.rows, chunk_rows):
+            adjacency.walls[r0:r0 + chunk_rows] = numpy.unpackbits(bits[r0:r0 + chunk_rows], axis=1, count=columns).view(bool)
+        return adjacency
+
+    def _allocate(self, rows, columns):
+        self.rows, self.columns = rows, columns
+        # the walls with a border of obstacles around the grid
+        self.padded = numpy.ones((self.rows + 2, self.columns + 2), dtype=bool)
+        self.walls = self.padded[1:-1, 1:-1]
+        self.tables = {}  # the tables built so far, by diagonal flag
+        self.hierarchies = {}  # the HPA* abstractions built so far, by diagonal flag
+        self.offsets = {diagonal: [dr * self.columns + dc for dr, dc in (DIRECTIONS_8 if diagonal else DIRECTIONS_4)]
+                        for diagonal in (False, True)}
+
+    def table(self, diagonal):
+        """ Returns the table of allowed moves for 4- or 8-connectivity, building it on first use """
+        diagonal = bool(diagonal)
+        if diagonal not in self.tables:
+            self.tables[diagonal] = self._block(0, self.rows, 0, self.columns, diagonal).ravel()
+        return self.tables[diagonal]
+
+    def set_wall(self, r, c, wall):
+        """ Adds or removes the obstacle of (r, c) and patches the tables built so far """
+        if self.walls[r, c] == bool(wall):
+            return
+        self.walls[r, c] = wall
+        r0, r1 = max(r - 1, 0), min(r + 2, self.rows)
+        c0, c1 = max(c - 1, 0), min(c + 2, self.columns)
+        for diagonal, table in self.tables.items():
+            table.reshape(self.rows, self.columns)[r0:r1, c0:c1] = self._block(r0, r1, c0, c1, diagonal)
+        for hierarchy in self.hierarchies.values():
+            hierarchy.invalidate(r, c)
+
+    def hierarchy(self, diagonal):
+        """ Returns the HPA* abstraction of the grid for 4- or 8-connectivity, creating it on first use """
+        diagonal = bool(diagonal)
+        if diagonal not in self.hierarchies:
+            self.hierarchies[diagonal] = Hierarchy(self, diagonal)
+        return self.hierarchies[diagonal]
+
+    def _block(self, r0, r1, c0, c1, diagonal):
+        """ Computes the table entries of the cells in rows r0..r1-1 and columns c0..c1-1 """
+        def shifted(dr, dc):
+            return self.padded[1 + r0 + dr:1 + r1 + dr, 1 + c0 + dc:1 + c1 + dc]
+
+        block = numpy.zeros((r1 - r0, c1 - c0), dtype=numpy.uint8)
+        for k, (dr, dc) in enumerate(DIRECTIONS_8 if diagonal else DIRECTIONS_4):
+            blocked = shifted(dr, dc) | shifted(0, 0)
+            if dr and dc:
+                # a diagonal move is allowed only if one of the two cells it cuts is free
+                blocked = blocked | (shifted(dr, 0) & shifted(0, dc))
+            block |= numpy.where(blocked, 0, 1 << k).astype(numpy.uint8)
+        return block
+
+    def neighbor_function(self, diagonal):
+        """ Returns a function giving the flat indices of the neighbors of a cell in priority order """
+        table = self.table(diagonal)
+        moves = [[offset for k, offset in enumerate(self.offsets[bool(diagonal)]) if mask & (1 << k)]
+                 for mask in range(256)]
+
+        def neighbors(index):
+            return [index + offset for offset in moves[table[index]]]
+        return neighbors
+
+
+class SearchResult(object):
+    """ The outcome of a completed search """
+    def __init__(self, found, path, expanded, distance, closed, frontier):
+        self.found = found  # flag that the goal was found
+        self.path = path  # the (row, col) cells from the robot to the target
+        self.expanded = expanded  # the number of nodes that have been expanded
+        self.distance = distance  # the length of the path
+        self.closed = closed  # the flat indices of the cells of the CLOSED SET, in an array
+        self.frontier = frontier  # the flat indices of the cells of the OPEN SET, in an array
+
+    @property
+    def steps(self):
+        return max(len(self.path) - 1, 0)
+
+
+def walls_hash(grid):
+    """ Returns a hash of the obstacles of a grid, which changes when any obstacle is painted or erased """
+    grid = numpy.asarray(grid)
+    return hashlib.sha1(b"%d:%d:" % grid.shape + numpy.packbits(grid == OBST).tobytes()).hexdigest()
+
+
+class ResultCache(object):
+    """
+    The most recently used completed searches, by walls_hash() of the grid,
+    robot, target, algorithm and diagonal flag. Keying by the content of the
+    grid makes the entries of a grid unreachable as soon as an obstacle
+    changes, and reachable again if the obstacle is put back. The cache holds
+    at most max_entries entries and max_cells cells of search state, dropping
+    the least recently used ones first.
+    """
+    def __init__(self, max_entries=32, max_cells=1 << 22):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self.entries = OrderedDict()  # key -> (value, cells), the most recently used last
+        self.cells = 0  # the cells of search state held
+        self.hits = self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    @staticmethod
+    def key(grid_hash, start, target, algorithm, diagonal):
+        return grid_hash, tuple(start), tuple(target), algorithm, bool(diagonal)
+
+    def get(self, key):
+        """ Returns the value stored under key, None if there is none """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, cells):
+        """
+        Stores a value, e.g. a completed search and its SearchResult.
+        :param cells: the size of the grid searched, which is what the value costs in memory
+        """
+        if key in self.entries:
+            self.cells -= self.entries.pop(key)[1]
+        if cells > self.max_cells:
+            return
+        self.entries[key] = (value, cells)
+        self.cells += cells
+        while len(self.entries) > self.max_entries or self.cells > self.max_cells:
+            self.cells -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        self.entries.clear()
+        self.cells = 0
+
+
+class Search(object):
+    """
+    A single search from the robot to the target.
+
+    The search state is kept in preallocated arrays indexed by the flat cell
+    index row * columns + col: the state of the cell (UNSEEN, OPEN, SHUT), its
+    predecessor, and for A*, Greedy and Dijkstra its cost g and evaluation f.
+    :param grid:      2d array of cell states; only OBST cells are treated as walls
+    :param start:     (row, col) of the robot
+    :param target:    (row, col) of the target
+    :param algorithm: one of ALGORITHMS
+    :param diagonal:  flag that diagonal movements are allowed
+    :param adjacency: the Adjacency of the grid, to share its tables between searches;
+                      when given, the grid is not read and may be None
+    """
+    algorithms = ("DFS", "BFS", "A*", "Greedy", "some")  # the algorithms of the class
+
+    def __init__(self, grid, start, target, algorithm="Greedy", diagonal=False, adjacency=None):
+        if algorithm not in self.algorithms:
+            raise ValueError("Unknown algorithm: {0}".format(algorithm))
+        if adjacency is None:
+            adjacency = Adjacency(grid)
+        self.rows, self.columns = adjacency.rows, adjacency.columns
+        self.neighbors = adjacency.neighbor_function(diagonal)
+        self.algorithm = algorithm
+        self.diagonal = bool(diagonal)
+        self.start = start[0] * self.columns + start[1]
+        self.target = target[0] * self.columns + target[1]
+        self.expanded = 0
+        self.found = False
+        size = self.rows * self.columns
+        self.state = numpy.zeros(size, dtype=numpy.uint8)
+        self.parent = numpy.full(size, -1, dtype=numpy.int32)
+        if algorithm in ["A*", "Greedy", "some", "JPS", "HPA*"]:
+            self.g = numpy.full(size, numpy.inf)  # the cost from the robot (dist[] for Dijkstra)
+            self.f = numpy.full(size, numpy.inf)  # the evaluation of the cell
+        else:
+            self.g = self.f = None
+        self.openCount = 0  # the number of cells in the OPEN SET
+        self.closedCount = 0  # the number of cells in the CLOSED SET
+        self.reopened = 0  # the closed cells that returned to the OPEN SET with a better evaluation
+        # The order in which the OPEN SET is expanded: a stack for DFS, a queue for BFS and
+        # a binary heap of (f, insertion number, index) for A*, Greedy and Dijkstra. Heap
+        # entries whose f no longer matches the cell are stale and skipped when popped.
+        self.openQueue = deque() if algorithm == "BFS" else []
+        self.counter = itertools.count()  # ties on f are broken by the order of insertion
+        if self.g is not None:
+            self.g[self.start] = 0
+            self.f[self.start] = 0
+        self.add_to_open(self.start)
+
+    @property
+    def exhausted(self):
+        """ True when there is nothing left to expand """
+        return self.openCount == 0
+
+    @property
+    def done(self):
+        return self.found or self.exhausted
+
+    def step(self):
+        """
+        Expands a single node.
+        :return: list of (row, col, state) for the cells whose state changed
+        """
+        changes = []
+        if self.done:
+            return changes
+        current = self.pop_open()
+        self.state[current] = SHUT
+        self.closedCount += 1
+        r, c = divmod(current, self.columns)
+        changes.append((r, c, CLOSED))
+        if current == self.target:
+            self.found = True
+            return changes
+        self.expanded += 1
+        if self.algorithm == "some":
+            self._relax(current, changes)
+        else:
+            self._expand(current, changes)
+        return changes
+
+    def run(self):
+        """ Runs the search to the end and returns its SearchResult """
+        while not self.done:
+            self.step()
+        return self.result()
+
+    def _relax(self, u, changes):
+        """ Dijkstra: relaxes the edges from u to its neighbors that are not yet in the CLOSED SET """
+        d = self.g[u]
+        for v in self.neighbors(u):
+            if self.state[v] == SHUT:
+                continue
+            alt = d + self.dist_between(u, v)
+            if alt < self.g[v]:
+                self.g[v] = self.f[v] = alt
+                self.parent[v] = u
+                # decrease-key v in Q: the old entry of v becomes stale
+                self.add_to_open(v)
+                changes.append(divmod(v, self.columns) + (FRONTIER,))
+
+    def _expand(self, current, changes):
+        successors = self.neighbors(current)
+        if self.algorithm in ["DFS", "BFS"]:
+            if self.algorithm == "DFS":
+                successors.reverse()
+            for cell in successors:
+                if self.state[cell] == UNSEEN:
+                    self.parent[cell] = current
+                    self.add_to_open(cell)
+                    changes.append(divmod(cell, self.columns) + (FRONTIER,))
+            return
+        for cell in successors:
+            g = 0 if self.algorithm == "Greedy" else self.g[current] + self.dist_between(current, cell)
+            self._offer(current, cell, g, changes)
+
+    def _offer(self, current, cell, g, changes):
+        """ Evaluates a successor of current at cost g, adding it to the OPEN SET if new or better """
+        r, c = divmod(cell, self.columns)
+        tr, tc = divmod(self.target, self.columns)
+        dxh = tc - c
+        dyh = tr - r
+        if self.diagonal:  # with diagonal movements, calculate the Euclidean distance
+            h = math.sqrt(dxh * dxh + dyh * dyh)
+        else:  # without diagonal movements, calculate the Manhattan distance
+            h = abs(dxh) + abs(dyh)
+        f = g + h
+        # If Sj is new, or the new evaluation is better than the old one
+        # (which may even reopen a closed state), add (Sj, new) to the OPEN SET.
+        if self.state[cell] == UNSEEN or self.f[cell] > f:
+            if self.state[cell] == SHUT:
+                self.reopened += 1
+                self.closedCount -= 1
+            self.g[cell] = g
+            self.f[cell] = f
+            self.parent[cell] = current
+            self.add_to_open(cell)
+            changes.append((r, c, FRONTIER))
+
+    def add_to_open(self, cell):
+        """ Adds a cell to the OPEN SET, superseding any older entry of the same cell """
+        if self.state[cell] != OPEN:
+            self.state[cell] = OPEN
+            self.openCount += 1
+        if self.f is not None:
+            heapq.heappush(self.openQueue, (float(self.f[cell]), next(self.counter), cell))
+        else:
+            self.openQueue.append(cell)
+
+    def pop_open(self):
+        """ Removes and returns the next cell of the OPEN SET """
+        if self.algorithm == "BFS":
+            cell = self.openQueue.popleft()
+        elif self.algorithm == "DFS":
+            cell = self.openQueue.pop()
+        else:
+            while True:
+                f, _, cell = heapq.heappop(self.openQueue)
+                if self.state[cell] == OPEN and self.f[cell] == f:
+                    break
+        self.openCount -= 1
+        return cell
+
+    def dist_between(self, u, v):
+        """
+        Returns the distance between two cells
+        :param u: the flat index of the first cell
+        :param v: the flat index of the other cell
+        :return:  the distance between the cells u and v
+        """
+        dy, dx = divmod(u, self.columns)
+        r, c = divmod(v, self.columns)
+        dx -= c
+        dy -= r
+        if self.diagonal:  # with diagonal movements calculate the Euclidean distance
+            return math.sqrt(dx * dx + dy * dy)
+        else:  # without diagonal movements calculate the Manhattan distance
+            return abs(dx) + abs(dy)
+
+    def parent_of(self, r, c):
+        """ Returns the (row, col) of the predecessor of (r, c), or None """
+        index = self.parent[r * self.columns + c]
+        return None if index < 0 else divmod(int(index), self.columns)
+
+    def path(self):
+        """ Returns the (row, col) cells from the robot to the target, or [] """
+        if not self.found:
+            return []
+        route = [self.target]
+        while route[-1] != self.start:
+            route.append(int(self.parent[route[-1]]))
+        route.reverse()
+        return [divmod(cell, self.columns) for cell in route]
+
+    def path_distance(self, route):
+        """ Measures the distance traveled along a path """
+        distance = 0.0
+        for (r1, c1), (r2, c2) in zip(route, route[1:]):
+            if self.diagonal:
+                distance += math.sqrt((r2 - r1) ** 2 + (c2 - c1) ** 2)
+            else:
+                distance += 1
+        return distance
+
+    def cells_in(self, state):
+        return numpy.flatnonzero(self.state == state)
+
+    def result(self):
+        route = self.path()
+        return SearchResult(self.found, route, self.expanded, self.path_distance(route),
+                            self.cells_in(SHUT), self.cells_in(OPEN))
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+class JumpPointSearch(Search):
+    """
+    Jump Point Search: A* whose successors are the jump points of the grid.
+
+    From a cell the search jumps in each direction that is not pruned, in a
+    straight or diagonal line, until a cell with a forced neighbor, i.e. one
+    that an equally short path avoiding the cell cannot reach; the target and,
+    on a diagonal, a cell from which a straight jump finds a jump point also
+    stop it. The cells jumped over are never stored in the OPEN SET. Without
+    diagonal movements the vertical lines play the part of the diagonal ones.
+    The pruning follows the corner rule of Adjacency, so the distance is
+    always the one of A*; path() fills in the cells between the jump points.
+    The walls are copied when the search is created, to jump through a flat
+    bytes object with a border of obstacles instead of the neighbor tables.
+    """
+    algorithms = ("JPS",)
+
+    def __init__(self, grid, start, target, algorithm="JPS", diagonal=False, adjacency=None):
+        if adjacency is None:
+            adjacency = Adjacency(grid)
+        Search.__init__(self, grid, start, target, algorithm, diagonal, adjacency)
+        self.stride = self.columns + 2  # the row length of the walls with their border
+        self.free = (~adjacency.padded).tobytes()  # 1 for the free cells, by index in the bordered grid
+        self.goal = self.padded(self.target)
+        self.neighbors = self.jump_points
+
+    def padded(self, index):
+        """ Returns the index in the bordered grid of a cell given by its flat index """
+        return index + (index // self.columns) * 2 + self.stride + 1
+
+    def jump_points(self, index):
+        """ Returns the flat indices of the jump points reached from a cell, along the directions not pruned """
+        r, c = divmod(index, self.columns)
+        parent = self.parent[index]
+        if parent < 0:
+            directions = DIRECTIONS_8 if self.diagonal else DIRECTIONS_4
+        else:
+            pr, pc = divmod(int(parent), self.columns)
+            directions = self.pruned_directions(self.padded(index), _sign(r - pr), _sign(c - pc))
+        points = []
+        for dr, dc in directions:
+            point = self.jump(self.padded(index), dr, dc)
+            if point >= 0:
+                r, c = divmod(point, self.stride)
+                points.append((r - 1) * self.columns + c - 1)
+        return points
+
+    def pruned_directions(self, x, dr, dc):
+        """ Returns the directions worth following from the bordered cell x, reached moving by (dr, dc) """
+        free, s = self.free, self.stride
+        if not self.diagonal:
+            if dc:  # the vertical directions and straight ahead
+                return (-1, 0), (1, 0), (0, dc)
+            return (0, -1), (0, 1), (dr, 0)
+        if dr and dc:
+            directions = [(dr, 0), (0, dc), (dr, dc)]
+            if not free[x - dc]:
+                directions.append((dr, -dc))
+            if not free[x - dr * s]:
+                directions.append((-dr, dc))
+            return directions
+        directions = [(dr, dc)]
+        # the diagonals past a wall beside the cell
+        for er, ec in (((0, 1), (0, -1)) if dr else ((1, 0), (-1, 0))):
+            if not free[x + er * s + ec]:
+                directions.append((dr + er, dc + ec))
+        return directions
+
+    def jump(self, x, dr, dc):
+        """ Returns the bordered index of the jump point reached from x moving by (dr, dc), -1 if none """
+        free, s, goal = self.free, self.stride, self.goal
+        d = dr * s + dc
+        if dr and dc:
+            while True:
+                # the move must not cut a corner between two obstacles
+                if not free[x + d] or not (free[x + dr * s] or free[x + dc]):
+                    return -1
+                x += d
+                if x == goal:
+                    return x
+                if free[x - dc + dr * s] and not free[x - dc] or free[x + dc - dr * s] and not free[x - dr * s]:
+                    return x
+                if self.jump(x, dr, 0) >= 0 or self.jump(x, 0, dc) >= 0:
+                    return x
+        e = 1 if dr else s  # a step across the direction of the jump
+        while True:
+            if not free[x + d]:
+                return -1
+            x += d
+            if x == goal:
+                return x
+            if self.diagonal:
+                # a wall beside the cell, with a free cell ahead of it
+                if free[x + d + e] and not free[x + e] or free[x + d - e] and not free[x - e]:
+                    return x
+            elif dc:
+                # a free cell beside the cell, behind a wall
+                if free[x + e] and not free[x + e - d] or free[x - e] and not free[x - e - d]:
+                    return x
+            elif free[x + 1] and not free[x + 1 - d] or free[x - 1] and not free[x - 1 - d] \
+                    or self.jump(x, 0, 1) >= 0 or self.jump(x, 0, -1) >= 0:
+                return x
+
+    def path(self):
+        """ Returns the (row, col) cells from the robot to the target, the jump points and the cells between them """
+        points = Search.path(self)
+        route = points[:1]
+        for r, c in points[1:]:
+            dr, dc = _sign(r - route[-1][0]), _sign(c - route[-1][1])
+            while route[-1] != (r, c):
+                route.append((route[-1][0] + dr, route[-1][1] + dc))
+        return route
+
+
+class Hierarchy(object):
+    """
+    The abstract graph of HPA* (hierarchical path-finding A*) over a grid.
+
+    The grid is split into square clusters of CLUSTER_SIZE cells. Along the
+    border of two clusters, every run of free cells facing free cells is an
+    entrance, crossed at its middle, or at both ends when longer than
+    ENTRANCE_SPLIT. The cells on either side of the crossings are the nodes of
+    the graph: a crossing joins two nodes at a cost of 1, and the nodes of a
+    cluster are joined by the lengths of their shortest paths inside it.
+    A cluster is built the first time a search reaches it and kept for the
+    next searches; painting or erasing an obstacle drops the cluster of the
+    cell, and the one across the border when the cell lies on it.
+    :param adjacency: the Adjacency of the grid, whose tables are followed inside the clusters
+    :param diagonal:  flag that diagonal movements are allowed
+    """
+    def __init__(self, adjacency, diagonal, size=CLUSTER_SIZE):
+        self.adjacency = adjacency
+        self.rows, self.columns = adjacency.rows, adjacency.columns
+        self.diagonal = bool(diagonal)
+        self.size = size
+        self.neighbors = adjacency.neighbor_function(diagonal)
+        self.borders = {}  # (cluster, cluster) -> the crossings of their border, as (cell, cell) pairs
+        self.clusters = {}  # cluster -> {node: [(node, cost), ...]}, the graph of the clusters built so far
+
+    def cluster_of(self, index):
+        r, c = divmod(index, self.columns)
+        return r // self.size, c // self.size
+
+    def edges(self, index):
+        """ Returns the (node, cost) edges from a node, [] if the cell is not a node """
+        return self.cluster(self.cluster_of(index)).get(index, [])
+
+    def cluster(self, cluster):
+        """ Returns the nodes of a cluster and their edges, building them on first use """
+        if cluster not in self.clusters:
+            cr, cc = cluster
+            nodes = {}
+            for other in ((cr - 1, cc), (cr, cc + 1), (cr + 1, cc), (cr, cc - 1)):
+                for mine, theirs in self.border(cluster, other):
+                    nodes.setdefault(mine, []).append((theirs, 1))
+            # the paths are the same both ways, so each node searches for the nodes after it only
+            order = list(nodes)
+            for i, node in enumerate(order):
+                dist = self.local_search(node, order[i + 1:])[0]
+                for other in order[i + 1:]:
+                    if other in dist:
+                        nodes[node].append((other, dist[other]))
+                        nodes[other].append((node, dist[other]))
+            self.clusters[cluster] = nodes
+        return self.clusters[cluster]
+
+    def border(self, cluster, other):
+        """ Returns the crossings from a cluster to an adjacent one, as (cell of cluster, cell of other) pairs """
+        if other[0] < 0 or other[1] < 0 or other[0] * self.size >= self.rows or other[1] * self.size >= self.columns:
+            return []
+        key = min(cluster, other), max(cluster, other)
+        if key not in self.borders:
+            self.borders[key] = self._crossings(*key)
+        if key[0] == cluster:
+            return self.borders[key]
+        return [(theirs, mine) for mine, theirs in self.borders[key]]
+
+    def _crossings(self, cluster, other):
+        (cr, cc), (orow, ocol) = cluster, other
+        k, columns = self.size, self.columns
+        walls = self.adjacency.walls
+        if orow > cr:  # the other cluster is below: a horizontal border
+            r, cells = orow * k, numpy.arange(cc * k, min(cc * k + k, columns))
+            free = ~(walls[r - 1, cells] | walls[r, cells])
+            pairs = zip((r - 1) * columns + cells, r * columns + cells)
+        else:  # the other cluster is on the right: a vertical border
+            c, cells = ocol * k, numpy.arange(cr * k, min(cr * k + k, self.rows))
+            free = ~(walls[cells, c - 1] | walls[cells, c])
+            pairs = zip(cells * columns + c - 1, cells * columns + c)
+        pairs = [(int(mine), int(theirs)) for mine, theirs in pairs]
+        crossings = []
+        i, n = 0, len(free)
+        while i < n:
+            if not free[i]:
+                i += 1
+                continue
+            j = i
+            while j + 1 < n and free[j + 1]:
+                j += 1
+            if j - i + 1 > ENTRANCE_SPLIT:
+                crossings += [pairs[i], pairs[j]]
+            else:
+                crossings.append(pairs[(i + j) // 2])
+            i = j + 1
+        return crossings
+
+    def local_search(self, source, goals=()):
+        """
+        Dijkstra's algorithm from a cell, without leaving its cluster.
+        :param goals: the cells whose distances are wanted; the search ends when they are all reached
+        :return: (dist, parent), dicts of the cells reached, exact for the goals
+        """
+        columns, k = self.columns, self.size
+        r, c = divmod(source, columns)
+        r0, c0 = r - r % k, c - c % k
+        left = set(goals)
+        left.discard(source)
+        dist = {source: 0}
+        parent = {source: -1}
+        shut = set()
+        queue = [(0, source)]
+        while queue and left:
+            d, u = heapq.heappop(queue)
+            if u in shut:
+                continue
+            shut.add(u)
+            left.discard(u)
+            ur, uc = divmod(u, columns)
+            for v in self.neighbors(u):
+                vr, vc = divmod(v, columns)
+                if not (r0 <= vr < r0 + k and c0 <= vc < c0 + k):
+                    continue
+                alt = d + (SQRT2 if vr != ur and vc != uc else 1)
+                if alt < dist.get(v, INFINITY):
+                    dist[v] = alt
+                    parent[v] = u
+                    heapq.heappush(queue, (alt, v))
+        return dist, parent
+
+    def local_path(self, source, target):
+        """ Returns the flat indices of a shortest path between two cells of a cluster, inside it """
+        parent = self.local_search(source, (target,))[1]
+        route = [target]
+        while route[-1] != source:
+            route.append(parent[route[-1]])
+        route.reverse()
+        return route
+
+    def invalidate(self, r, c):
+        """ Drops the clusters whose graph may change with the obstacle of (r, c) """
+        k = self.size
+        cluster = (r // k, c // k)
+        self.clusters.pop(cluster, None)
+        for dr, dc, edge in ((-1, 0, r % k == 0), (1, 0, r % k == k - 1), (0, -1, c % k == 0), (0, 1, c % k == k - 1)):
+            if edge:
+                other = (cluster[0] + dr, cluster[1] + dc)
+                self.borders.pop((min(cluster, other), max(cluster, other)), None)
+                self.clusters.pop(other, None)
+
+
+class HierarchicalSearch(Search):
+    """
+    HPA*: A* over the abstract graph of the grid, see Hierarchy. The robot and
+    the target join the graph through the shortest paths inside their
+    clusters, and the path found is refined into cells one cluster at a time.
+    Only the nodes of the graph are expanded, so the search is much faster on
+    large grids, but the path is not always the shortest: it crosses the
+    borders of the clusters at their entrances only.
+    """
+    algorithms = ("HPA*",)
+
+    def __init__(self, grid, start, target, algorithm="HPA*", diagonal=False, adjacency=None):
+        if adjacency is None:
+            adjacency = Adjacency(grid)
+        Search.__init__(self, grid, start, target, algorithm, diagonal, adjacency)
+        self.hierarchy = adjacency.hierarchy(diagonal)
+        self.route = None  # the refined path, once computed
+        # the edges that join the robot and the target to the nodes of their clusters
+        hierarchy = self.hierarchy
+        goals = list(hierarchy.cluster(hierarchy.cluster_of(self.start)))
+        if hierarchy.cluster_of(self.target) == hierarchy.cluster_of(self.start):
+            goals.append(self.target)
+        dist = hierarchy.local_search(self.start, goals)[0]
+        self.startEdges = [(node, dist[node]) for node in goals if node != self.start and node in dist]
+        goals = hierarchy.cluster(hierarchy.cluster_of(self.target))
+        dist = hierarchy.local_search(self.target, goals)[0]
+        self.targetEdges = {node: dist[node] for node in goals if node != self.target and node in dist}
+        self.neighbors = self.graph_neighbors
+
+    def graph_neighbors(self, index):
+        """ Returns the (node, cost) edges from a node of the abstract graph, with those of the robot and the target """
+        edges = self.hierarchy.edges(index)
+        if index == self.start:
+            edges = edges + self.startEdges
+        if index in self.targetEdges:
+            edges = edges + [(self.target, self.targetEdges[index])]
+        return edges
+
+    def _expand(self, current, changes):
+        for cell, cost in self.neighbors(current):
+            self._offer(current, cell, self.g[current] + cost, changes)
+
+    def path(self):
+        """ Returns the (row, col) cells from the robot to the target, refined from the nodes of the path """
+        if self.route is None and self.found:
+            nodes = [r * self.columns + c for r, c in Search.path(self)]
+            route = nodes[:1]
+            for node in nodes[1:]:
+                if self.hierarchy.cluster_of(node) != self.hierarchy.cluster_of(route[-1]):
+                    route.append(node)  # a crossing
+                else:
+                    route += self.hierarchy.local_path(route[-1], node)[1:]
+            self.route = [divmod(cell, self.columns) for cell in route]
+        return self.route or []
+
+
+class BidirectionalSearch(Search):
+    """
+    A search from the robot and from the target at the same time, which meet
+    in the middle.
+
+    Each direction has its own state, predecessor and cost arrays and its own
+    OPEN SET, and the direction with the smaller OPEN SET expands next. When a
+    cell reached from one side has already been reached from the other, the
+    path through it is a candidate. The search ends when the sum of the keys at
+    the top of the two OPEN SETs proves that no shorter path is left. Bi-BFS
+    counts moves, Bi-Dijkstra distances, and Bi-A* adds to the distances the
+    average of the two heuristics, half the distance left to the target minus
+    half the distance from the robot, with the opposite sign backwards. Both
+    directions then agree on the length of every path, which keeps the sum
+    rule valid. The cells of both directions are reported as FRONTIER and CLOSED.
+    """
+    algorithms = BIDIRECTIONAL
+
+    def __init__(self, grid, start, target, algorithm="Bi-A*", diagonal=False, adjacency=None):
+        if algorithm not in self.algorithms:
+            raise ValueError("Unknown algorithm: {0}".format(algorithm))
+        if adjacency is None:
+            adjacency = Adjacency(grid)
+        self.rows, self.columns = adjacency.rows, adjacency.columns
+        self.neighbors = adjacency.neighbor_function(diagonal)
+        self.algorithm = algorithm
+        self.diagonal = bool(diagonal)
+        self.start = start[0] * self.columns + start[1]
+        self.target = target[0] * self.columns + target[1]
+        self.expanded = 0
+        self.found = False
+        self.finished = False  # flag that the directions met with a shortest path, or cannot meet
+        size = self.rows * self.columns
+        self.states = [numpy.zeros(size, dtype=numpy.uint8) for _ in range(2)]  # forward, backward
+        self.parents = [numpy.full(size, -1, dtype=numpy.int32) for _ in range(2)]
+        self.costs = [numpy.full(size, numpy.inf) for _ in range(2)]  # the cost from the robot / to the target
+        self.evaluations = [numpy.full(size, numpy.inf) for _ in range(2)]
+        self.openQueues = [deque(), deque()] if algorithm == "Bi-BFS" else [[], []]
+        self.openCounts = [0, 0]
+        self.openCount = 0  # the number of cells in both OPEN SETs
+        self.closedCount = 0  # the number of cells in both CLOSED SETs
+        self.counter = itertools.count()
+        self.best = numpy.inf  # the cost of the shortest path found so far
+        self.meeting = -1  # the cell where that path goes from one direction to the other
+        for side, cell in ((0, self.start), (1, self.target)):
+            self.costs[side][cell] = 0
+            self.evaluations[side][cell] = self.potential(side, cell)
+            self.add_to_open(side, cell)
+        if self.start == self.target:
+            self.best, self.meeting = 0, self.start
+            self.found = self.finished = True
+
+    @property
+    def exhausted(self):
+        return self.finished and not self.found
+
+    @property
+    def done(self):
+        return self.finished
+
+    def heuristic(self, cell, end):
+        r, c = divmod(cell, self.columns)
+        tr, tc = divmod(end, self.columns)
+        if self.diagonal:  # with diagonal movements, calculate the Euclidean distance
+            return math.sqrt((tr - r) ** 2 + (tc - c) ** 2)
+        else:  # without diagonal movements, calculate the Manhattan distance
+            return abs(tr - r) + abs(tc - c)
+
+    def potential(self, side, cell):
+        """ Returns what Bi-A* adds to the cost of the cell in a direction, 0 for the other algorithms """
+        if self.algorithm != "Bi-A*":
+            return 0
+        p = (self.heuristic(cell, self.target) - self.heuristic(cell, self.start)) / 2
+        return p if side == 0 else -p
+
+    def step(self):
+        """
+        Expands a single node of the direction with the smaller OPEN SET.
+        :return: list of (row, col, state) for the cells whose state changed
+        """
+        changes = []
+        if self.finished:
+            return changes
+        side = 0 if self.openCounts[0] <= self.openCounts[1] else 1
+        state, cost, other = self.states[side], self.costs[side], self.costs[1 - side]
+        u = self.pop_open(side)
+        state[u] = SHUT
+        self.closedCount += 1
+        self.expanded += 1
+        changes.append(divmod(u, self.columns) + (CLOSED,))
+        for v in self.neighbors(u):
+            if state[v] == SHUT:
+                continue
+            g = cost[u] + (1 if self.algorithm == "Bi-BFS" else self.dist_between(u, v))
+            if g < cost[v]:
+                cost[v] = g
+                self.evaluations[side][v] = g + self.potential(side, v)
+                self.parents[side][v] = u
+                self.add_to_open(side, v)
+                changes.append(divmod(v, self.columns) + (FRONTIER,))
+                if g + other[v] < self.best:
+                    self.best = g + other[v]
+                    self.meeting = v
+        self.check_end()
+        return changes
+
+    def check_end(self):
+        """ Ends the search when no path can be shorter than the best one found """
+        if not self.openCounts[0] or not self.openCounts[1]:
+            self.finished = True
+        else:
+            self.finished = self.top_key(0) + self.top_key(1) >= self.best - EPSILON
+        self.found = self.finished and self.meeting >= 0
+
+    def add_to_open(self, side, cell):
+        """ Adds a cell to the OPEN SET of a direction, superseding any older entry of the same cell """
+        if self.states[side][cell] != OPEN:
+            self.states[side][cell] = OPEN
+            self.openCounts[side] += 1
+            self.openCount += 1
+        if self.algorithm == "Bi-BFS":
+            self.openQueues[side].append(cell)
+        else:
+            # ties on f go to the cell farthest from its start, which heads straight for the other side
+            heapq.heappush(self.openQueues[side], (float(self.evaluations[side][cell]), -float(self.costs[side][cell]),
+                                                   next(self.counter), cell))
+
+    def top_key(self, side):
+        """ Discards the outdated entries at the top of the OPEN SET of a direction and returns its key """
+        queue = self.openQueues[side]
+        if self.algorithm == "Bi-BFS":
+            return self.costs[side][queue[0]]
+        state, evaluation = self.states[side], self.evaluations[side]
+        while queue[0][0] != evaluation[queue[0][3]] or state[queue[0][3]] != OPEN:
+            heapq.heappop(queue)
+        return queue[0][0]
+
+    def pop_open(self, side):
+        """ Removes and returns the next cell of the OPEN SET of a direction """
+        if self.algorithm == "Bi-BFS":
+            cell = self.openQueues[side].popleft()
+        else:
+            self.top_key(side)
+            cell = heapq.heappop(self.openQueues[side])[3]
+        self.openCounts[side] -= 1
+        self.openCount -= 1
+        return cell
+
+    def parent_of(self, r, c):
+        """ Returns the (row, col) of the predecessor of (r, c) in the direction that reached it, or None """
+        index = r * self.columns + c
+        side = 0 if self.states[0][index] != UNSEEN else 1
+        parent = self.parents[side][index]
+        return None if parent < 0 else divmod(int(parent), self.columns)
+
+    def path(self):
+        """ Returns the (row, col) cells from the robot to the target, or [] """
+        if not self.found:
+            return []
+        route = [self.meeting]
+        while route[-1] != self.start:
+            route.append(int(self.parents[0][route[-1]]))
+        route.reverse()
+        while route[-1] != self.target:
+            route.append(int(self.parents[1][route[-1]]))
+        return [divmod(cell, self.columns) for cell in route]
+
+    def cells_in(self, state):
+        return numpy.flatnonzero((self.states[0] == state) | (self.states[1] == state))
+
+
+def new_search(grid, start, target, algorithm="Greedy", diagonal=False, adjacency=None):
+    """ Returns a search of the algorithm: a BidirectionalSearch, a JumpPointSearch, a HierarchicalSearch or a Search """
+    if algorithm in BIDIRECTIONAL:
+        return BidirectionalSearch(grid, start, target, algorithm, diagonal, adjacency)
+    if algorithm in JumpPointSearch.algorithms:
+        return JumpPointSearch(grid, start, target, algorithm, diagonal, adjacency)
+    if algorithm in HierarchicalSearch.algorithms:
+        return HierarchicalSearch(grid, start, target, algorithm, diagonal, adjacency)
+    return Search(grid, start, target, algorithm, diagonal, adjacency)
+
+
+def key_less(a, b):
+    """
+    Compares two D* Lite keys. Sums of 1 and sqrt(2) along different paths may
+    differ by a rounding error where they should tie, so equal within EPSILON
+    counts as equal.
+    """
+    if abs(a[0] - b[0]) > EPSILON:
+        return a[0] < b[0]
+    return a[1] < b[1] - EPSILON
+
+
+class Replanner(object):
+    """
+    Incremental planner (D* Lite) for Real-Time mode.
+
+    The search runs backwards, from the target to the robot, and keeps its
+    g/rhs values and its queue between calls of compute(). Toggling an obstacle
+    only re-evaluates the 3x3 block around it and moving the robot only shifts
+    the keys of the queue, so compute() repairs just the affected part of the
+    previous search. Moving the target starts over. The paths found are
+    shortest paths, i.e. of the same length as those of A* and Dijkstra.
+    :param grid:      2d array of cell states; only OBST cells are treated as walls
+    :param start:     (row, col) of the robot
+    :param target:    (row, col) of the target
+    :param diagonal:  flag that diagonal movements are allowed
+    :param adjacency: the Adjacency of the grid; set_wall() keeps it up to date
+    """
+    def __init__(self, grid, start, target, diagonal=False, adjacency=None):
+        if adjacency is None:
+            adjacency = Adjacency(grid)
+        self.adjacency = adjacency
+        self.rows, self.columns = adjacency.rows, adjacency.columns
+        self.diagonal = bool(diagonal)
+        self.neighbors = adjacency.neighbor_function(diagonal)
+        self.start = start[0] * self.columns + start[1]
+        self.target = target[0] * self.columns + target[1]
+        self.expanded = 0  # the number of nodes expanded by the last compute()
+        self.found = False
+        self.reset()
+
+    def reset(self):
+        size = self.rows * self.columns
+        self.g = numpy.full(size, numpy.inf)  # the distance to the target
+        self.rhs = numpy.full(size, numpy.inf)  # the one-step lookahead of g
+        self.inQueue = numpy.zeros(size, dtype=bool)
+        self.key1 = numpy.zeros(size)
+        self.key2 = numpy.zeros(size)
+        self.queue = []  # heap of (key1, key2, insertion number, cell); outdated entries are skipped
+        self.counter = itertools.count()
+        self.km = 0.0  # the sum of the heuristic shifts caused by the moves of the robot
+        self.last = self.start
+        self.rhs[self.target] = 0
+        self.push(self.target)
+
+    def heuristic(self, u, v):
+        r1, c1 = divmod(u, self.columns)
+        r2, c2 = divmod(v, self.columns)
+        if self.diagonal:  # with diagonal movements, calculate the Euclidean distance
+            return math.sqrt((r1 - r2) ** 2 + (c1 - c2) ** 2)
+        else:  # without diagonal movements, calculate the Manhattan distance
+            return abs(r1 - r2) + abs(c1 - c2)
+
+    def cost(self, u, v):
+        return SQRT2 if u % self.columns != v % self.columns and u // self.columns != v // self.columns else 1
+
+    def calculate_key(self, u):
+        m = min(self.g[u], self.rhs[u])
+        return m + self.heuristic(self.start, u) + self.km, m
+
+    def push(self, u):
+        k1, k2 = self.calculate_key(u)
+        self.inQueue[u] = True
+        self.key1[u] = k1
+        self.key2[u] = k2
+        heapq.heappush(self.queue, (k1, k2, next(self.counter), u))
+
+    def top(self):
+        """ Discards the outdated entries at the top of the queue and returns the top one, or None """
+        queue = self.queue
+        while queue:
+            k1, k2, _, u = queue[0]
+            if self.inQueue[u] and self.key1[u] == k1 and self.key2[u] == k2:
+                return queue[0]
+            heapq.heappop(queue)
+        return None
+
+    def update_vertex(self, u):
+        if u != self.target:
+            best = numpy.inf
+            for v in self.neighbors(u):
+                best = min(best, self.cost(u, v) + self.g[v])
+            self.rhs[u] = best
+        self.inQueue[u] = False
+        if self.g[u] != self.rhs[u]:
+            self.push(u)
+
+    def compute(self, cancelled=None):
+        """
+        Repairs the shortest path after the last changes and returns the SearchResult.
+        :param cancelled: function polled between expansions; when it returns True the repair
+                          stops and None is returned, and the next call resumes it
+        """
+        self.expanded = 0
+        while True:
+            if cancelled is not None and cancelled():
+                return None
+            entry = self.top()
+            if entry is None:
+                break
+            start_key = self.calculate_key(self.start)
+            if not key_less(entry, start_key) and self.rhs[self.start] == self.g[self.start]:
+                break
+            u = entry[3]
+            heapq.heappop(self.queue)
+            self.inQueue[u] = False
+            new_key = self.calculate_key(u)
+            if key_less(entry, new_key):
+                self.push(u)
+            elif self.g[u] > self.rhs[u]:
+                self.g[u] = self.rhs[u]
+                self.expanded += 1
+                for v in self.neighbors(u):
+                    self.update_vertex(v)
+            else:
+                self.g[u] = numpy.inf
+                self.expanded += 1
+                for v in self.neighbors(u) + [u]:
+                    self.update_vertex(v)
+        self.found = bool(numpy.isfinite(self.g[self.start]))
+        return self.result()
+
+    def set_wall(self, r, c, wall):
+        """ Adds or removes the obstacle of (r, c) and re-evaluates the cells whose moves changed """
+        self.adjacency.set_wall(r, c, wall)
+        for nr in range(max(r - 1, 0), min(r + 2, self.rows)):
+            for nc in range(max(c - 1, 0), min(c + 2, self.columns)):
+                self.update_vertex(nr * self.columns + nc)
+
+    def move_start(self, r, c):
+        """ Moves the robot; the queue stays valid by shifting future keys by km """
+        self.start = r * self.columns + c
+        self.km += self.heuristic(self.last, self.start)
+        self.last = self.start
+
+    def move_target(self, r, c):
+        """ Moves the target; the search starts over """
+        self.target = r * self.columns + c
+        self.reset()
+
+    def parent_of(self, r, c):
+        """ Returns the (row, col) of the next cell towards the target from (r, c), or None """
+        u = r * self.columns + c
+        best, best_cost = None, numpy.inf
+        for v in self.neighbors(u):
+            if self.cost(u, v) + self.g[v] < best_cost:
+                best, best_cost = v, self.cost(u, v) + self.g[v]
+        return None if best is None or u == self.target else divmod(best, self.columns)
+
+    def path(self):
+        """ Returns the (row, col) cells from the robot to the target, or [] """
+        if not self.found:
+            return []
+        route = [divmod(self.start, self.columns)]
+        while route[-1] != divmod(self.target, self.columns):
+            route.append(self.parent_of(*route[-1]))
+        return route
+
+    def path_distance(self, route):
+        """ Measures the distance traveled along a path """
+        distance = 0.0
+        for (r1, c1), (r2, c2) in zip(route, route[1:]):
+            distance += SQRT2 if r1 != r2 and c1 != c2 else 1
+        return distance
+
+    def result(self):
+        route = self.path()
+        return SearchResult(self.found, route, self.expanded, self.path_distance(route),
+                            numpy.flatnonzero(numpy.isfinite(self.g) & ~self.inQueue), numpy.flatnonzero(self.inQueue))
+
+
+def solve(grid, start, target, algorithm="Greedy", diagonal=False, adjacency=None):
+    """
+    Runs a complete search without any user interface.
+    :return: the SearchResult of the search
+    """
+    return new_search(grid, start, target, algorithm, diagonal, adjacency).run()
@@ -0,0 +1,76 @@
+"""
+A background thread for the searches of the user interface.
+
+Tkinter must only be used from the thread of its mainloop, so the searches
+of Real-Time mode run on the thread of a SearchWorker and the user interface
+polls for their results with after(). Only the newest job matters: a job
+submitted while another one waits replaces it, and the one running is asked
+to stop, so a burst of edits costs at most one step of the outdated search.
+The jobs poll the function they are given to know when to give up. A job
+that raises does not stop the thread: the exception is its result.
+"""
+import threading
+
+
+class SearchWorker(object):
+    """ Runs jobs on a daemon thread, one at a time, newest first """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.number = 0  # the number of the newest job
+        self.pending = None  # the (number, job) waiting for the thread
+        self.running = None  # the number of the job running, None when idle
+        self.finished = None  # the (number, value or exception) of the newest job completed, until polled
+        self.thread = None
+
+    def submit(self, job):
+        """
+        Queues a job, cancelling the older ones.
+        :param job: function of a cancelled() function, returning its result, or None if cancelled() became true
+        :return: the number of the job, as returned by poll()
+        """
+        with self.condition:
+            self.number += 1
+            self.pending = (self.number, job)
+            self.finished = None
+            self.condition.notify_all()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="SearchWorker", daemon=True)
+            self.thread.start()
+        return self.number
+
+    def cancel(self, wait=True):
+        """ Cancels the pending and running jobs, waiting for the running one to stop if wait is set """
+        with self.condition:
+            self.number += 1
+            self.pending = self.finished = None
+            while wait and self.running is not None:
+                self.condition.wait()
+
+    def poll(self):
+        """
+        Returns the (number, value) of the newest job if it completed since the last call, else None. The value of
+        a job that raised is the exception.
+        """
+        with self.condition:
+            finished, self.finished = self.finished, None
+        return finished
+
+    def _loop(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                (number, job), self.pending = self.pending, None
+                self.running = number
+            try:
+                value = job(lambda: number != self.number)
+            except Exception as e:  # reported to the poller, the thread serves the next jobs
+                value = e
+            finally:
+                with self.condition:
+                    self.running = None
+                    self.condition.notify_all()
+            if value is not None:
+                with self.condition:
+                    if number == self.number:
+                        self.finished = (number, value)